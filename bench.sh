@@ -0,0 +1 @@
+python src/bench_render.py
\ No newline at end of file
@@ -1,7 +1,14 @@
 import os
+import sys
 import argparse
+import mimetypes
+from functools import partial
+from urllib.parse import urlsplit, urlunsplit
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from bundle import Bundle  # noqa: E402
+
 
 class CORSHTTPRequestHandler(SimpleHTTPRequestHandler):
     def end_headers(self):
@@ -15,17 +22,60 @@ class CORSHTTPRequestHandler(SimpleHTTPRequestHandler):
         self.end_headers()
 
 
+class BundleHTTPRequestHandler(CORSHTTPRequestHandler):
+    """Serves files straight from a site bundle (archive or objects directory), using memory-mapped reads."""
+    def __init__(self, *args, bundle=None, **kwargs):
+        self.bundle = bundle
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        body = self.send_bundle_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_bundle_headers()
+
+    def send_bundle_headers(self):
+        rel_path = self.bundle.resolve(self.path)
+        if rel_path is None:
+            self.send_error(404, "File not found")
+            return None
+        parts = urlsplit(self.path)
+        if rel_path.endswith("index.html") and not parts.path.endswith(("/", "index.html")):
+            # like SimpleHTTPRequestHandler: a directory url gets its trailing slash, for relative links
+            self.send_response(301)
+            self.send_header("Location", urlunsplit(parts._replace(path=parts.path + "/")))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        body = self.bundle.read(rel_path)
+        self.send_response(200)
+        self.send_header("Content-Type", mimetypes.guess_type(rel_path)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", f'"{self.bundle.manifest[rel_path]}"')
+        self.end_headers()
+        return body
+
+
 def run(
     server_class=HTTPServer,
     handler_class=CORSHTTPRequestHandler,
     port=8000,
     directory=None,
+    bundle=None,
 ):
-    if directory:  # Change the current working directory if directory is specified
-        os.chdir(directory)
+    if bundle:
+        handler_class = partial(BundleHTTPRequestHandler, bundle=Bundle(bundle))
+        source = f"bundle '{bundle}'"
+    else:
+        # The directory is resolved on every request rather than chdir'ed into once,
+        # so a `main.py --swap` rebuild of it is picked up instead of serving a deleted tree.
+        handler_class = partial(handler_class, directory=directory or ".")
+        source = f"directory '{directory}'"
     server_address = ("", port)
     httpd = server_class(server_address, handler_class)
-    print(f"Serving HTTP on http://localhost:{port} from directory '{directory}'...")
+    print(f"Serving HTTP on http://localhost:{port} from {source}...")
     httpd.serve_forever()
 
 
@@ -35,7 +85,10 @@ if __name__ == "__main__":
         "--dir", type=str, help="Directory to serve files from", default="."
     )
     parser.add_argument("--port", type=int, help="Port to serve HTTP on", default=8888)
+    parser.add_argument(
+        "--bundle", type=str, help="Site bundle (archive file or objects directory) to serve instead of --dir", default=None
+    )
     args = parser.parse_args()
 
-    run(port=args.port, directory=args.dir)
+    run(port=args.port, directory=args.dir, bundle=args.bundle)
 
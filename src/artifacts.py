@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+from datetime import date, datetime, timezone
+from xml.sax.saxutils import escape, quoteattr
+from writer import OutputWriter
+
+SHARD_SIZE = 50000
+FEED_SIZE = 20
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+class PageMeta:
+    '''What the build knows about a generated page, collected while generating it.'''
+    def __init__(self, dest_path:str, title:str, date:date, aliases:list[str]|None=None, meta:dict|None=None) -> None:
+        self.dest_path = dest_path
+        self.title = title
+        self.date = date
+        self.aliases = aliases or []
+        self.meta = meta or {}
+
+    def __eq__(self, other) -> bool:
+        return (self.dest_path == other.dest_path and
+                self.title == other.title and
+                self.date == other.date and
+                self.aliases == other.aliases)
+
+    def __repr__(self) -> str:
+        return f'PageMeta("{self.dest_path}", "{self.title}", {self.date}, aliases={self.aliases})'
+
+
+def page_url(dest_path:str, dest_dir:str) -> str:
+    '''"public/majesty/index.html" -> "/majesty/"'''
+    rel_path = os.path.relpath(dest_path, dest_dir).replace(os.sep, '/')
+    if rel_path == "index.html":
+        return "/"
+    if rel_path.endswith("/index.html"):
+        rel_path = rel_path[:-len("index.html")]
+    return "/" + rel_path
+
+def alias_path(alias:str, dest_dir:str) -> str:
+    '''"/old/" -> "public/old/index.html", "/old.html" -> "public/old.html"'''
+    rel_path = alias.strip('/')
+    if not rel_path.endswith(".html"):
+        rel_path = os.path.join(rel_path, "index.html")
+    path = os.path.normpath(os.path.join(dest_dir, rel_path))
+    if os.path.commonpath([os.path.abspath(path), os.path.abspath(dest_dir)]) != os.path.abspath(dest_dir):
+        raise Exception(f'alias {alias} is outside {dest_dir}')
+    return path
+
+def date_to_str(d:date) -> str:
+    if isinstance(d, datetime):
+        d = d.astimezone(timezone.utc) if d.tzinfo else d
+        return d.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return f"{d.isoformat()}T00:00:00Z"
+
+def digest(content:str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+def load_manifest(manifest_path:str) -> dict:
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as manifest_file:
+        return json.load(manifest_file)
+
+def save_manifest(manifest_path:str, manifest:dict, writer:OutputWriter) -> None:
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    writer.write(manifest_path, json.dumps(manifest, sort_keys=True))
+
+
+def sitemap_shard_xml(entries:list[list[str]], base_url:str) -> str:
+    urls = "".join(f"<url><loc>{escape(base_url + url)}</loc><lastmod>{lastmod}</lastmod></url>\n"
+                   for url, lastmod in entries)
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n{urls}</urlset>\n'
+
+def sitemap_index_xml(shards:list[list[list[str]]], base_url:str) -> str:
+    items = "".join(f"<sitemap><loc>{escape(base_url)}/sitemap-{i}.xml</loc>"
+                    f"<lastmod>{max(lastmod for _, lastmod in shard)}</lastmod></sitemap>\n"
+                    for i, shard in enumerate(shards) if shard)
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n{items}</sitemapindex>\n'
+
+def write_sitemap(pages:list[PageMeta], base_url:str, dest_dir:str, manifest:dict, writer:OutputWriter,
+                  shard_size:int=SHARD_SIZE) -> int:
+    '''
+    It writes `sitemap.xml` as an index of `sitemap-N.xml` shards of at most `shard_size` urls.
+    Urls keep the shard they were assigned in previous builds (recorded in `manifest`), and new ones fill
+    the first shard with room, so only the shards whose entries changed are rewritten (all of them if `base_url` changed).
+    It returns the number of shards written.
+    '''
+    new_entries = {page_url(p.dest_path, dest_dir): date_to_str(p.date) for p in pages}
+    old_shards = manifest.get("sitemap", [])
+    shards = [[e for e in shard if e[0] in new_entries] for shard in old_shards]
+    dirty = {i for i, (old, new) in enumerate(zip(old_shards, shards)) if len(old) != len(new)}
+    placed = set()
+    for i, shard in enumerate(shards):
+        for entry in shard:
+            placed.add(entry[0])
+            if entry[1] != new_entries[entry[0]]:
+                entry[1] = new_entries[entry[0]]
+                dirty.add(i)
+    free = 0
+    for url in sorted(new_entries.keys() - placed):
+        while free < len(shards) and len(shards[free]) >= shard_size:
+            free += 1
+        if free == len(shards):
+            shards.append([])
+        shards[free].append([url, new_entries[url]])
+        dirty.add(free)
+    while shards and not shards[-1]:
+        shards.pop()
+    for i in range(len(old_shards)):
+        shard_path = os.path.join(dest_dir, f"sitemap-{i}.xml")
+        if i >= len(shards) or not shards[i]:
+            dirty.discard(i)
+            if os.path.exists(shard_path):
+                os.remove(shard_path)
+    dirty |= {i for i, shard in enumerate(shards)
+              if shard and (manifest.get("sitemap_base_url") != base_url
+                            or not os.path.exists(os.path.join(dest_dir, f"sitemap-{i}.xml")))}
+    for i, shard in enumerate(shards):
+        if i in dirty:
+            writer.write(os.path.join(dest_dir, f"sitemap-{i}.xml"), sitemap_shard_xml(shard, base_url))
+        elif shard:
+            writer.keep(os.path.join(dest_dir, f"sitemap-{i}.xml"))
+    index_path = os.path.join(dest_dir, "sitemap.xml")
+    if dirty or len(shards) != len(old_shards) or not os.path.exists(index_path):
+        writer.write(index_path, sitemap_index_xml(shards, base_url))
+    else:
+        writer.keep(index_path)
+    manifest["sitemap"] = shards
+    manifest["sitemap_base_url"] = base_url
+    return len(dirty)
+
+def author_xml(name:str) -> str:
+    return f"<author><name>{escape(name)}</name></author>"
+
+def feed_xml(pages:list[PageMeta], base_url:str, dest_dir:str, feed_title:str, author:str) -> str:
+    entries = ""
+    for page in pages:
+        link = base_url + page_url(page.dest_path, dest_dir)
+        entry_author = author_xml(str(page.meta["author"])) if page.meta.get("author") else ""
+        entries += (f"<entry><title>{escape(page.title)}</title><link href={quoteattr(link)}/>"
+                    f"<id>{escape(link)}</id><updated>{date_to_str(page.date)}</updated>{entry_author}</entry>\n")
+    updated = date_to_str(pages[0].date) if pages else "1970-01-01T00:00:00Z"
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">\n'
+            f'<title>{escape(feed_title)}</title><link href={quoteattr(base_url + "/")}/>'
+            f'<id>{escape(base_url)}/</id><updated>{updated}</updated>{author_xml(author)}\n{entries}</feed>\n')
+
+def write_feed(pages:list[PageMeta], base_url:str, dest_dir:str, manifest:dict, writer:OutputWriter,
+               size:int=FEED_SIZE, author:str|None=None) -> bool:
+    '''
+    It writes an Atom `feed.xml` with the `size` most recent pages, only if it changed. It returns whether it was written.
+    The feed author is `author`, else the `author` front matter of the home page, else the feed title;
+    entries with their own `author` front matter get it too.
+    '''
+    recent = sorted(pages, key=lambda p: (date_to_str(p.date), page_url(p.dest_path, dest_dir)), reverse=True)[:size]
+    home = next((p for p in pages if page_url(p.dest_path, dest_dir) == "/"), None)
+    feed_title = home.title if home else base_url
+    author = author or (str(home.meta["author"]) if home and home.meta.get("author") else feed_title)
+    content = feed_xml(recent, base_url, dest_dir, feed_title, author)
+    feed_path = os.path.join(dest_dir, "feed.xml")
+    content_digest = digest(content)
+    if manifest.get("feed") == content_digest and os.path.exists(feed_path):
+        writer.keep(feed_path)
+        return False
+    writer.write(feed_path, content)
+    manifest["feed"] = content_digest
+    return True
+
+def redirect_html(target:str) -> str:
+    return (f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Redirecting</title>'
+            f'<link rel="canonical" href={quoteattr(target)}><meta http-equiv="refresh" content={quoteattr("0; url=" + target)}>'
+            f'</head><body><a href={quoteattr(target)}>{escape(target)}</a></body></html>\n')
+
+def is_redirect_stub(stub_path:str, target:str) -> bool:
+    '''Whether `stub_path` still holds the redirect page to `target`, and not e.g. a page generated there since.'''
+    if not os.path.isfile(stub_path):
+        return False
+    with open(stub_path) as stub_file:
+        return stub_file.read() == redirect_html(target)
+
+def write_redirects(pages:list[PageMeta], dest_dir:str, manifest:dict, writer:OutputWriter) -> int:
+    '''
+    It writes the `_redirects` map (one "alias target 301" per line) and an html redirect page
+    for every page alias. Only the redirect pages that changed are rewritten; it returns how many were.
+    Redirect pages of aliases removed since the last build are deleted, unless something else was written there.
+    Aliases outside `dest_dir` or on the path of a generated page raise an exception.
+    '''
+    redirects = {alias: page_url(p.dest_path, dest_dir) for p in pages for alias in p.aliases}
+    page_paths = {os.path.normpath(p.dest_path) for p in pages}
+    for alias in redirects:
+        if alias_path(alias, dest_dir) in page_paths:
+            raise Exception(f'alias {alias} would overwrite the generated page {alias_path(alias, dest_dir)}')
+    old_redirects = manifest.get("redirects", {})
+    written = 0
+    for alias, target in sorted(redirects.items()):
+        stub_path = alias_path(alias, dest_dir)
+        if old_redirects.get(alias) == target and os.path.exists(stub_path):
+            writer.keep(stub_path)
+            continue
+        os.makedirs(os.path.dirname(stub_path), exist_ok=True)
+        writer.write(stub_path, redirect_html(target))
+        written += 1
+    for alias in old_redirects.keys() - redirects.keys():
+        stub_path = alias_path(alias, dest_dir)
+        if stub_path not in page_paths and is_redirect_stub(stub_path, old_redirects[alias]):
+            os.remove(stub_path)
+    redirects_path = os.path.join(dest_dir, "_redirects")
+    if redirects != old_redirects or not os.path.exists(redirects_path):
+        writer.write(redirects_path, "".join(f"{alias} {target} 301\n" for alias, target in sorted(redirects.items())))
+    else:
+        writer.keep(redirects_path)
+    manifest["redirects"] = redirects
+    return written
@@ -0,0 +1,36 @@
+import time
+from htmlnode import markdown_to_html_node
+
+BLOCK = """## Section {i}
+
+Some **bold** text & an *italic* word, with a [link](https://example.com/?a=1&b={i})
+    and indented   continuation lines.
+
+```
+if a < b and b > c:
+    print("<tag> & done")
+```
+
+* first item
+* second   item with `x < y`
+"""
+
+
+def bench(markdown:str, minify:bool, rounds:int) -> tuple[int, float]:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        html = markdown_to_html_node(markdown).to_html(minify)
+    return len(html.encode()), (time.perf_counter() - start) / rounds
+
+def main():
+    markdown = "# Benchmark\n\n" + "\n".join(BLOCK.format(i=i) for i in range(2000))
+    rounds = 5
+    full_bytes, full_time = bench(markdown, False, rounds)
+    min_bytes, min_time = bench(markdown, True, rounds)
+    print(f"markdown: {len(markdown.encode())} bytes, {rounds} rounds")
+    print(f"render:          {full_bytes} bytes, {full_time * 1000:.1f} ms")
+    print(f"render + minify: {min_bytes} bytes, {min_time * 1000:.1f} ms")
+    print(f"saved: {full_bytes - min_bytes} bytes ({(full_bytes - min_bytes) / full_bytes:.1%})")
+
+if __name__ == "__main__":
+    main()
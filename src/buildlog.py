@@ -0,0 +1,76 @@
+import json
+import sys
+
+QUIET = 0
+SUMMARY = 1
+VERBOSE = 2
+LEVELS = {"quiet": QUIET, "summary": SUMMARY, "verbose": VERBOSE}
+BUFFER_SIZE = 1 << 16
+
+
+class BuildLog:
+    '''
+    Leveled, buffered build output, plus an optional json-lines event stream.
+    - Messages above `level` are dropped before any formatting: callers pass the parts
+      of a message as separate arguments instead of an f-string.
+    - Messages are written to `stream` in blocks of about `buffer_size` characters.
+    - With `events_path`, every `event()` is written there as one json object per line.
+    '''
+    def __init__(self, level:int=SUMMARY, stream=None, events_path:str|None=None, buffer_size:int=BUFFER_SIZE) -> None:
+        self.level = level
+        self.stream = stream or sys.stdout
+        self.buffer_size = buffer_size
+        self._buffer: list[str] = []
+        self._buffered = 0
+        self._events = open(events_path, 'w', buffering=buffer_size) if events_path else None
+
+    @property
+    def has_events(self) -> bool:
+        return self._events is not None
+
+    def log(self, level:int, *msgs) -> None:
+        if level > self.level:
+            return
+        line = " ".join(map(str, msgs)) + "\n"
+        self._buffer.append(line)
+        self._buffered += len(line)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def event(self, **fields) -> None:
+        if self._events is not None:
+            self._events.write(json.dumps(fields, default=str) + "\n")
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.stream.write("".join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+        self.stream.flush()
+        if self._events is not None:
+            self._events.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self._events is not None:
+            self._events.close()
+            self._events = None
+
+build_log = BuildLog()
+
+def configure(level:int=SUMMARY, events_path:str|None=None) -> None:
+    global build_log
+    build_log.close()
+    build_log = BuildLog(level, events_path=events_path)
+
+def log(*msgs, level:int=VERBOSE) -> None:
+    build_log.log(level, *msgs)
+
+def event(**fields) -> None:
+    build_log.event(**fields)
+
+def has_events() -> bool:
+    return build_log.has_events
+
+def close() -> None:
+    build_log.close()
@@ -0,0 +1,141 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+from collections import OrderedDict
+from urllib.parse import unquote
+from writer import OutputWriter, file_digest, CHUNK_SIZE
+
+MAGIC = b"SSGBNDL1"
+HEADER = struct.Struct("<8sQQ")
+MMAP_THRESHOLD = 1 << 20
+MAX_MAPS = 64
+
+
+def iter_files(src_dir:str) -> list[tuple[str, str]]:
+    '''(relative url path, file path) of every file under `src_dir`, sorted.'''
+    files = []
+    for root, dirs, names in os.walk(src_dir):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            files.append((os.path.relpath(path, src_dir).replace(os.sep, '/'), path))
+    return files
+
+def write_archive(src_dir:str, archive_path:str) -> int:
+    '''
+    It packs `src_dir` into a single indexed archive:
+    a header (magic, index offset, index length), the file contents, and a json index
+    {path: [offset, length, sha256]}. Identical files are stored once.
+    It returns the number of distinct blobs stored.
+    '''
+    index: dict[str, list] = {}
+    blobs: dict[str, tuple[int, int]] = {}
+    parent = os.path.dirname(os.path.abspath(archive_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(archive_path)}.", suffix=".tmp", dir=parent)
+    try:
+        with os.fdopen(fd, 'wb', buffering=CHUNK_SIZE) as archive:
+            archive.write(HEADER.pack(MAGIC, 0, 0))
+            for rel_path, path in iter_files(src_dir):
+                digest = file_digest(path)
+                if digest not in blobs:
+                    offset = archive.tell()
+                    with open(path, 'rb') as src_file:
+                        while chunk := src_file.read(CHUNK_SIZE):
+                            archive.write(chunk)
+                    blobs[digest] = (offset, archive.tell() - offset)
+                offset, length = blobs[digest]
+                index[rel_path] = [offset, length, digest]
+            index_data = json.dumps(index, sort_keys=True).encode()
+            index_offset = archive.tell()
+            archive.write(index_data)
+            archive.seek(0)
+            archive.write(HEADER.pack(MAGIC, index_offset, len(index_data)))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, archive_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(blobs)
+
+def object_path(objects_dir:str, digest:str) -> str:
+    return os.path.join(objects_dir, "objects", digest[:2], digest[2:])
+
+def write_objects(src_dir:str, objects_dir:str, writer:OutputWriter|None=None) -> int:
+    '''
+    It stores the files of `src_dir` as content-addressed objects (`objects/ab/cdef...`) plus a
+    `manifest.json` mapping every path to its sha256. Objects already stored, by this build or a
+    previous one, are not written again. It returns the number of new objects.
+    '''
+    writer = writer or OutputWriter()
+    manifest = {}
+    written = 0
+    for rel_path, path in iter_files(src_dir):
+        digest = file_digest(path)
+        manifest[rel_path] = digest
+        dest_path = object_path(objects_dir, digest)
+        if not os.path.exists(dest_path):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            writer.copy(path, dest_path)
+            written += 1
+    writer.write(os.path.join(objects_dir, "manifest.json"), json.dumps(manifest, sort_keys=True))
+    return written
+
+
+class Bundle:
+    '''
+    Read access to a site bundle without unpacking it: an archive file (one memory map for the whole
+    archive) or an objects directory. Objects smaller than `mmap_threshold` bytes are read on each request;
+    larger ones are memory-mapped, keeping at most `max_maps` maps (each holds a file descriptor) open.
+    '''
+    def __init__(self, path:str, mmap_threshold:int=MMAP_THRESHOLD, max_maps:int=MAX_MAPS) -> None:
+        self.path = path
+        self.mmap_threshold = mmap_threshold
+        self.max_maps = max_maps
+        self._maps: OrderedDict[str, mmap.mmap] = OrderedDict()
+        if os.path.isdir(path):
+            with open(os.path.join(path, "manifest.json")) as manifest_file:
+                self.manifest: dict[str, str] = json.load(manifest_file)
+            self.index = None
+            self.archive = None
+        else:
+            with open(path, 'rb') as archive_file:
+                self.archive = mmap.mmap(archive_file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, index_offset, index_length = HEADER.unpack_from(self.archive)
+            if magic != MAGIC:
+                raise Exception(f'not a site bundle {path}')
+            self.index = json.loads(self.archive[index_offset:index_offset + index_length])
+            self.manifest = {rel_path: entry[2] for rel_path, entry in self.index.items()}
+
+    def resolve(self, url_path:str) -> str | None:
+        '''"/" -> "index.html", "/majesty/" or "/majesty" -> "majesty/index.html", "/a%20b.html" -> "a b.html"'''
+        rel_path = unquote(url_path.split('?', 1)[0].split('#', 1)[0]).lstrip('/')
+        for candidate in (rel_path, f"{rel_path.rstrip('/')}/index.html".lstrip('/')):
+            if candidate in self.manifest:
+                return candidate
+        return None
+
+    def read(self, rel_path:str) -> memoryview:
+        if self.archive is not None:
+            assert self.index is not None
+            offset, length, _ = self.index[rel_path]
+            return memoryview(self.archive)[offset:offset + length]
+        digest = self.manifest[rel_path]
+        if digest in self._maps:
+            self._maps.move_to_end(digest)
+            return memoryview(self._maps[digest])
+        path = object_path(self.path, digest)
+        with open(path, 'rb') as object_file:
+            size = os.fstat(object_file.fileno()).st_size
+            if size < self.mmap_threshold or size == 0:
+                return memoryview(object_file.read())
+            self._maps[digest] = mmap.mmap(object_file.fileno(), 0, access=mmap.ACCESS_READ)
+        while len(self._maps) > self.max_maps:
+            _, evicted = self._maps.popitem(last=False)
+            try:
+                evicted.close()
+            except BufferError:
+                pass  # still being sent: it is freed once its last view is released
+        return memoryview(self._maps[digest])
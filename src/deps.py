@@ -0,0 +1,55 @@
+import json
+import os
+from writer import OutputWriter
+
+
+class DependencyManifest:
+    '''
+    For every source file: the files its output depends on (itself, the template, the fragments it
+    includes) with their mtimes, and the pages it produced as (dest_path, title).
+    A source is up to date when none of its dependencies changed and all its pages still exist.
+    Recorded entries are dropped when the build `options` change.
+    '''
+    def __init__(self, manifest_path:str, options:dict) -> None:
+        self.manifest_path = manifest_path
+        self.options = options
+        data = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as manifest_file:
+                data = json.load(manifest_file)
+        self.sources: dict[str, dict] = data.get("sources", {}) if data.get("options") == options else {}
+        self.seen: set[str] = set()
+
+    def fresh_pages(self, from_path:str) -> list[tuple[str, str]] | None:
+        '''It returns the pages recorded for `from_path` if they are up to date, else None.'''
+        self.seen.add(from_path)
+        entry = self.sources.get(from_path)
+        if entry is None:
+            return None
+        for dep, mtime in entry["deps"].items():
+            if not os.path.exists(dep) or os.stat(dep).st_mtime_ns != mtime:
+                return None
+        if not all(os.path.exists(dest_path) for dest_path, _ in entry["pages"]):
+            return None
+        return [(dest_path, title) for dest_path, title in entry["pages"]]
+
+    def recorded_pages(self, from_path:str) -> list[tuple[str, str]] | None:
+        '''The pages `from_path` produced in the last build that recorded it, up to date or not.'''
+        entry = self.sources.get(from_path)
+        return [(dest_path, title) for dest_path, title in entry["pages"]] if entry else None
+
+    def record(self, from_path:str, deps:list[str], pages:list[tuple[str, str]]) -> None:
+        self.seen.add(from_path)
+        self.sources[from_path] = {
+            "deps": {dep: os.stat(dep).st_mtime_ns for dep in deps},
+            "pages": pages,
+        }
+
+    def remove_unseen(self) -> None:
+        '''It forgets the sources not seen in this build (deleted files); their pages are pruned by the build.'''
+        for from_path in self.sources.keys() - self.seen:
+            del self.sources[from_path]
+
+    def save(self, writer:OutputWriter) -> None:
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        writer.write(self.manifest_path, json.dumps({"options": self.options, "sources": self.sources}, sort_keys=True))
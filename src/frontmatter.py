@@ -0,0 +1,101 @@
+import re
+from datetime import date, datetime
+from typing import Iterable, Iterator
+
+FENCE = "---"
+
+DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+DATETIME_RE = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2})?(\.\d+)?(Z|[+-]\d{2}:?\d{2})?")
+INT_RE = re.compile(r"[-+]?\d+")
+FLOAT_RE = re.compile(r"[-+]?\d*\.\d+")
+KEY_RE = re.compile(r"([A-Za-z_][\w-]*)\s*:(.*)")
+LIST_ITEM_RE = re.compile(r"\s*-\s+(.*)")
+
+
+def parse_value(raw:str):
+    '''It converts a front matter scalar or inline list ("[a, b]") into a python value.'''
+    raw = raw.strip()
+    if not raw:
+        return None
+    if len(raw) >= 2 and raw[0] in '"\'' and raw[-1] == raw[0]:
+        return raw[1:-1]
+    if raw.startswith('[') and raw.endswith(']'):
+        items = re.findall(r'\s*("[^"]*"|\'[^\']*\'|[^,]+)', raw[1:-1])
+        return [parse_value(item) for item in items if item.strip()]
+    if raw.lower() in ("true", "false"):
+        return raw.lower() == "true"
+    if INT_RE.fullmatch(raw):
+        return int(raw)
+    if FLOAT_RE.fullmatch(raw):
+        return float(raw)
+    if DATE_RE.fullmatch(raw):
+        return date.fromisoformat(raw)
+    if DATETIME_RE.fullmatch(raw):
+        return datetime.fromisoformat(raw)
+    return raw
+
+def parse_front_matter(lines:Iterable[str]) -> dict:
+    '''
+    It parses the lines between the `---` fences: "key: value" pairs, inline "[a, b]" lists,
+    "- item" lists under an empty key, dates, numbers and booleans. Lines starting with # are comments.
+    '''
+    meta: dict = {}
+    list_key = None
+    for line in lines:
+        line = line.rstrip('\n')
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        item = LIST_ITEM_RE.fullmatch(line)
+        if item and list_key is not None:
+            meta[list_key].append(parse_value(item[1]))
+            continue
+        pair = KEY_RE.fullmatch(line)
+        if not pair:
+            raise Exception(f"Invalid front matter line: {line}")
+        key, raw = pair[1], pair[2]
+        if raw.strip():
+            meta[key] = parse_value(raw)
+            list_key = None
+        else:
+            meta[key] = []
+            list_key = key
+    return meta
+
+def split_front_matter(markdown:str) -> tuple[dict, str]:
+    '''It returns the front matter of a document (empty if it has none) and the markdown that follows it.'''
+    if not markdown.startswith(FENCE):
+        return {}, markdown
+    lines = markdown.splitlines(keepends=True)
+    if lines[0].rstrip() != FENCE:
+        return {}, markdown
+    for i, line in enumerate(lines[1:], 1):
+        if line.rstrip() == FENCE:
+            return parse_front_matter(lines[1:i]), "".join(lines[i + 1:])
+    raise Exception("matching closing front matter fence --- is not found.")
+
+def skip_front_matter(lines:Iterator[str]) -> Iterator[str]:
+    '''It yields the lines of a document after its front matter, if any.'''
+    first = next(lines, None)
+    if first is None:
+        return
+    if first.rstrip() == FENCE:
+        for line in lines:
+            if line.rstrip() == FENCE:
+                break
+        else:
+            raise Exception("matching closing front matter fence --- is not found.")
+    else:
+        yield first
+    yield from lines
+
+def scan_front_matter(path:str) -> dict:
+    '''Metadata-only scan: it reads just the front matter at the top of a file and never reads its body.'''
+    with open(path) as md_file:
+        if md_file.readline().rstrip() != FENCE:
+            return {}
+        lines = []
+        for line in md_file:
+            if line.rstrip() == FENCE:
+                return parse_front_matter(lines)
+            lines.append(line)
+    raise Exception("matching closing front matter fence --- is not found.")
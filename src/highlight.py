@@ -0,0 +1,118 @@
+import functools
+import hashlib
+import json
+import os
+import re
+from writer import OutputWriter
+
+PYTHON_KEYWORDS = ("False None True and as assert async await break class continue def del elif else except "
+                   "finally for from global if import in is lambda nonlocal not or pass raise return try while "
+                   "with yield match case").split()
+PYTHON_BUILTINS = ("abs all any bool bytes dict enumerate filter float int isinstance len list map max min "
+                   "next object open print range repr set sorted str sum super tuple type zip self").split()
+SHELL_KEYWORDS = "if then else elif fi for in do done while until case esac function return select time".split()
+SHELL_BUILTINS = ("alias cd echo eval exec exit export local printf pwd read readonly set shift source test "
+                  "trap unset sudo").split()
+
+def words(names:list[str]) -> str:
+    return r"\b(?:" + "|".join(names) + r")\b"
+
+LEXERS = {
+    "python": re.compile("|".join([
+        r"(?P<comment>#[^\n]*)",
+        r"(?P<string>[rRbBuUfF]{0,2}(?:'''[\s\S]*?'''|\"\"\"[\s\S]*?\"\"\"|'(?:\\.|[^'\\\n])*'|\"(?:\\.|[^\"\\\n])*\"))",
+        r"(?P<decorator>^[ \t]*@[\w.]+)",
+        rf"(?P<keyword>{words(PYTHON_KEYWORDS)})",
+        rf"(?P<builtin>{words(PYTHON_BUILTINS)})",
+        r"(?P<number>\b(?:0[xX][0-9a-fA-F_]+|\d[\d_]*\.?\d*(?:[eE][+-]?\d+)?j?)\b)",
+    ]), re.MULTILINE),
+    "shell": re.compile("|".join([
+        r"(?P<comment>(?<![^\s;])#[^\n]*)",
+        r"(?P<string>'[^']*'|\"(?:\\.|[^\"\\])*\")",
+        r"(?P<variable>\$\{[^}\n]*\}|\$\w+|\$[@#?$!*-])",
+        rf"(?P<keyword>{words(SHELL_KEYWORDS)})",
+        rf"(?P<builtin>{words(SHELL_BUILTINS)})",
+        r"(?P<option>(?<!\S)--?[A-Za-z][\w-]*)",
+    ])),
+}
+ALIASES = {"py": "python", "python3": "python", "sh": "shell", "bash": "shell", "zsh": "shell",
+           "console": "shell", "shell-session": "shell"}
+
+
+def tokenize(code:str, language:str) -> list[tuple[str|None, str]]:
+    '''It splits `code` into (token class, text) pairs; text between tokens has a None class.'''
+    tokens: list[tuple[str|None, str]] = []
+    last = 0
+    for match in LEXERS[language].finditer(code):
+        if match.start() == match.end():
+            continue
+        if match.start() > last:
+            tokens.append((None, code[last:match.start()]))
+        tokens.append((match.lastgroup, match.group()))
+        last = match.end()
+    if last < len(code):
+        tokens.append((None, code[last:]))
+    return tokens
+
+
+@functools.lru_cache(maxsize=None)
+def lexer_digest(lexer:re.Pattern) -> str:
+    '''A short hash of a lexer's pattern and flags: it changes whenever its rules or keyword lists do.'''
+    return hashlib.sha256(f"{lexer.flags}:{lexer.pattern}".encode()).hexdigest()[:12]
+
+
+class HighlightCache:
+    '''
+    Highlighted snippets by (language, lexer hash, snippet hash): in memory, and on disk under `directory` if given,
+    so they are reused across builds until the lexer changes. Each entry is written atomically.
+    '''
+    def __init__(self, directory:str|None=None) -> None:
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._memory: dict[str, list] = {}
+        self._writer = OutputWriter()
+
+    def key(self, language:str, code:str) -> str:
+        return f"{language}-{lexer_digest(LEXERS[language])}-{hashlib.sha256(code.encode()).hexdigest()}"
+
+    def path(self, key:str) -> str:
+        assert self.directory
+        return os.path.join(self.directory, key[-2:], f"{key}.json")
+
+    def get(self, language:str, code:str) -> list[tuple[str|None, str]]:
+        key = self.key(language, code)
+        if key in self._memory:
+            self.hits += 1
+            return self._memory[key]
+        tokens = None
+        if self.directory and os.path.exists(self.path(key)):
+            with open(self.path(key)) as cache_file:
+                tokens = [tuple(t) for t in json.load(cache_file)]
+        if tokens is None:
+            self.misses += 1
+            tokens = tokenize(code, language)
+            if self.directory:
+                os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+                self._writer.write(self.path(key), json.dumps(tokens))
+        else:
+            self.hits += 1
+        self._memory[key] = tokens
+        return tokens
+
+cache = HighlightCache()
+
+def configure_cache(directory:str|None) -> None:
+    global cache
+    cache = HighlightCache(directory)
+
+
+def normalize_language(language:str) -> str:
+    language = language.lower()
+    return ALIASES.get(language, language)
+
+def highlight(code:str, language:str) -> list[tuple[str|None, str]] | None:
+    '''It returns the (cached) tokens of a code snippet, or None if the language is not supported (only python and shell are).'''
+    if language not in LEXERS:
+        return None
+    return cache.get(language, code)
@@ -1,6 +1,13 @@
 from textnode import TextNode, TextType, text_to_textnodes
+from highlight import highlight, normalize_language
+from frontmatter import split_front_matter
 from enum import Enum
+from typing import Iterable, Iterator
+import copy
+import html
+import os
 import re
+import textwrap
 
 class BlockType(Enum):
 	paragraph = 1
@@ -9,6 +16,22 @@ class BlockType(Enum):
 	quote = 4
 	unordered_list = 5
 	ordered_list = 6
+	include = 7
+
+RAW_TEXT_TAGS = ("code", "pre")
+PRESERVE_WHITESPACE_TAGS = ("code", "pre", "textarea")
+ENTITY_RE = re.compile(r"&(?!#\d+;|#[xX][0-9a-fA-F]+;|[A-Za-z][A-Za-z0-9]*;)")
+WHITESPACE_RE = re.compile(r"\s+")
+INCLUDE_RE = re.compile(r"\{\{<\s*include\s+(\S+)\s*>\}\}")
+MAX_INCLUDE_DEPTH = 16
+
+def escape_html(text:str, raw:bool=False) -> str:
+	'''
+	It escapes text content: `<`, `>` and `&`, except the `&` of an entity reference (`&copy;`, `&#169;`),
+	which markdown keeps. With `raw` (code), every `&` is escaped.
+	'''
+	text = text.replace("&", "&amp;") if raw else ENTITY_RE.sub("&amp;", text)
+	return text.replace("<", "&lt;").replace(">", "&gt;")
 
 class HTMLNode:
 	"""
@@ -17,19 +40,51 @@ class HTMLNode:
 	- An HTMLNode without a value will be assumed to have children
 	- An HTMLNode without children will be assumed to have a value
 	- An HTMLNode without props simply won't have any attributes
+	The escaped value and props are computed on the first render and cached until they are reassigned.
 	"""
+	raw_text = False
+
 	def __init__(self, tag: str | None = None, value: str | None = None, children: list | None = None, props: dict | None = None) -> None:
 		self.tag = tag
 		self.value = value
 		self.children = children
 		self.props = props
 
-	def to_html(self) -> str:
+	@property
+	def value(self) -> str | None:
+		return self._value
+	@value.setter
+	def value(self, value: str | None) -> None:
+		self._value = value
+		self._html_value: str | None = None
+		self._minified_value: str | None = None
+
+	@property
+	def props(self) -> dict | None:
+		return self._props
+	@props.setter
+	def props(self, props: dict | None) -> None:
+		self._props = props
+		self._props_html: str | None = None
+
+	def to_html(self, minify: bool = False) -> str:
 		raise NotImplementedError
 	def props_to_html(self) -> str:
-		if not self.props:
-			return ""
-		return "".join(f' {attr}="{val}"' for attr, val in self.props.items())
+		if self._props_html is None:
+			if not self.props:
+				self._props_html = ""
+			else:
+				self._props_html = "".join(f' {attr}="{html.escape(str(val))}"' for attr, val in self.props.items())
+		return self._props_html
+	def value_to_html(self, minify: bool = False) -> str:
+		assert self.value is not None
+		if self._html_value is None:
+			self._html_value = escape_html(self.value, self.raw_text or self.tag in RAW_TEXT_TAGS)
+		if not minify or self.tag in PRESERVE_WHITESPACE_TAGS:
+			return self._html_value
+		if self._minified_value is None:
+			self._minified_value = WHITESPACE_RE.sub(" ", self._html_value)
+		return self._minified_value
 	def __eq__(self, other) -> bool:
 		return (self.tag == other.tag and
                 self.value == other.value and
@@ -45,25 +100,164 @@ class LeafNode(HTMLNode):
 	def __init__(self, tag: str | None = None, value: str | None = None, props: dict | None = None) -> None:
 		assert value is not None, f"Value required"
 		super().__init__(tag=tag, value=value, props=props)
-	def to_html(self) -> str:
+	def to_html(self, minify: bool = False) -> str:
 		if self.value is None:
 			raise ValueError("No value found", self)
 		if not self.tag:
-			return self.value
-		return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+			return self.value_to_html(minify)
+		return f"<{self.tag}{self.props_to_html()}>{self.value_to_html(minify)}</{self.tag}>"
 	
+class CodeNode(LeafNode):
+	'''A leaf inside a highlighted code block: its text is escaped like code, entity references included.'''
+	raw_text = True
+
+class FragmentNode(HTMLNode):
+	'''
+	The blocks of an included markdown fragment, inlined in every page that includes it.
+	It is rendered once per minify mode and the html is reused.
+	'''
+	def __init__(self, children: list[HTMLNode], toc_entries: list[tuple[int, str, str]], deps: set[str]) -> None:
+		super().__init__(children=children)
+		self.toc_entries = toc_entries
+		self.deps = deps
+		self._rendered: dict[bool, str] = {}
+	def with_ids(self, renames: dict[str, str]) -> "FragmentNode":
+		'''A copy for a single page, where the headings whose id is in `renames` get their new id.'''
+		assert self.children is not None
+		children: list[HTMLNode] = []
+		for child in self.children:
+			if isinstance(child, FragmentNode):
+				child = child.with_ids(renames)
+			elif child.props and child.props.get("id") in renames:
+				child = copy.copy(child)
+				child.props = {**child.props, "id": renames[child.props["id"]]}
+			children.append(child)
+		entries = [(level, renames.get(slug, slug), title) for level, slug, title in self.toc_entries]
+		return FragmentNode(children, entries, self.deps)
+	def to_html(self, minify: bool = False) -> str:
+		if minify not in self._rendered:
+			assert self.children is not None
+			self._rendered[minify] = "".join(child.to_html(minify) for child in self.children)
+		return self._rendered[minify]
+
+fragment_cache: dict[str, FragmentNode] = {}
+
+class Includes:
+	'''
+	It resolves the `{{< include path >}}` blocks of a page, `path` being relative to the including file.
+	- Fragments are converted once per build and shared through `cache`; a page whose heading ids
+	  clash with the fragment's renders a copy with re-ided headings (see `FragmentNode.with_ids`).
+	- Include cycles, and includes nested deeper than MAX_INCLUDE_DEPTH, raise an exception.
+	- Every file the page includes, directly or not, is collected in `deps`.
+	'''
+	def __init__(self, from_path:str, cache:dict[str, FragmentNode]|None=None) -> None:
+		self.stack = [os.path.abspath(from_path)]
+		self.cache = cache if cache is not None else fragment_cache
+		self.deps: set[str] = set()
+
+	def include(self, path:str) -> FragmentNode:
+		full_path = os.path.abspath(os.path.join(os.path.dirname(self.stack[-1]), path))
+		fragment = self.cache.get(full_path)
+		if full_path in self.stack or (fragment and fragment.deps.intersection(self.stack)):
+			raise Exception(f"include cycle: {' -> '.join(self.stack + [full_path])}")
+		if fragment is None:
+			if not os.path.isfile(full_path):
+				raise Exception(f'Cannot read "include" from {full_path}')
+			if len(self.stack) > MAX_INCLUDE_DEPTH:
+				raise Exception(f"includes nested deeper than {MAX_INCLUDE_DEPTH}: {full_path}")
+			with open(full_path) as fragment_file:
+				_, markdown = split_front_matter(fragment_file.read())
+			outer_deps, self.deps = self.deps, set()
+			self.stack.append(full_path)
+			try:
+				toc = TableOfContents()
+				children = [markdown_block_to_html_node(b, toc, self) for b in markdown_to_blocks(markdown)]
+			finally:
+				self.stack.pop()
+				fragment_deps, self.deps = self.deps, outer_deps
+			fragment = FragmentNode(children, toc.entries, fragment_deps)
+			self.cache[full_path] = fragment
+		self.deps.add(full_path)
+		self.deps |= fragment.deps
+		return fragment
+
 class ParentNode(HTMLNode):
 	def __init__(self, tag: str | None = None, children: list[HTMLNode] | None = None, props: dict | None = None) -> None:
 		assert children, "Children required"
 		super().__init__(tag=tag, children= children, props=props)
-	def to_html(self) -> str:
+	def to_html(self, minify: bool = False) -> str:
 		if not self.tag:
 			raise ValueError("No tag found")
 		if not self.children:
 			raise ValueError("No children found")
-		children_html = "".join(child.to_html() for child in self.children)
+		minify = minify and self.tag not in PRESERVE_WHITESPACE_TAGS
+		children_html = "".join(child.to_html(minify) for child in self.children)
 		return f'<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>'
 
+def slugify(text:str) -> str:
+	'''It turns a heading text into an anchor id: "Hi **you**, [me](/me)!" -> "hi-you-me".'''
+	text = re.sub(r"!?\[([^\]]*)\]\([^)]*\)", r"\1", text)
+	slug = re.sub(r"[^\w\s-]", "", text.lower())
+	slug = re.sub(r"[\s_-]+", "-", slug).strip("-")
+	return slug or "section"
+
+class TableOfContents:
+	'''
+	Headings of a page, collected while its markdown is converted.
+	Every heading gets a unique slug id: repeated slugs get a "-1", "-2"... suffix.
+	'''
+	def __init__(self) -> None:
+		self.entries: list[tuple[int, str, str]] = []
+		self._slugs: set[str] = set()
+
+	def add(self, level:int, text:str) -> str:
+		slug = self._unique(slugify(text))
+		title = "".join(n.text for n in text_to_textnodes(text))
+		self.entries.append((level, slug, title))
+		return slug
+
+	def extend(self, entries:list[tuple[int, str, str]]) -> dict[str, str]:
+		'''
+		It appends the headings of an included fragment, which already have their ids.
+		Ids already taken in the page get a suffix like in `add`; it returns them as {fragment id: page id}.
+		'''
+		renames = {}
+		for level, slug, title in entries:
+			unique = self._unique(slug)
+			if unique != slug:
+				renames[slug] = unique
+			self.entries.append((level, unique, title))
+		return renames
+
+	def _unique(self, base:str) -> str:
+		slug = base
+		i = 0
+		while slug in self._slugs:
+			i += 1
+			slug = f"{base}-{i}"
+		self._slugs.add(slug)
+		return slug
+
+	def to_html_node(self) -> HTMLNode | None:
+		'''A <nav> with nested <ul> lists following the heading levels, or None if there are no headings.'''
+		if not self.entries:
+			return None
+		top: list = []
+		stack: list[tuple[int, list]] = [(0, top)]
+		for level, slug, title in self.entries:
+			while stack[-1][0] >= level:
+				stack.pop()
+			children: list = []
+			stack[-1][1].append((LeafNode("a", title, {"href": f"#{slug}"}), children))
+			stack.append((level, children))
+		def to_ul(items) -> HTMLNode:
+			return ParentNode("ul", [ParentNode("li", [a, to_ul(sub)] if sub else [a]) for a, sub in items])
+		return ParentNode("nav", [to_ul(top)], {"class": "toc"})
+
+	def to_html(self, minify: bool = False) -> str:
+		node = self.to_html_node()
+		return node.to_html(minify) if node else ""
+
 def text_node_to_html_node(text_node:TextNode) -> HTMLNode:
     mapping = {
         TextType.TEXT: (LeafNode,{"value":text_node.text}),
@@ -85,7 +279,22 @@ def markdown_to_blocks(markdown:str) -> list[str]:
     blocks = map(lambda b: b.strip('\n'), blocks)
     return list(filter(lambda b: b is not None and b, blocks))
 
+def iter_markdown_blocks(lines:Iterable[str]) -> Iterator[str]:
+	'''Streaming variant of markdown_to_blocks: it yields the blocks of a document read line by line (e.g. from an open file).'''
+	block: list[str] = []
+	for line in lines:
+		line = line.rstrip('\n')
+		if line:
+			block.append(line)
+		elif block:
+			yield '\n'.join(block)
+			block = []
+	if block:
+		yield '\n'.join(block)
+
 def block_to_block_type(md_block:str) -> BlockType:
+	if md_block.startswith('{{<') and INCLUDE_RE.fullmatch(md_block):
+		return BlockType.include
 	if md_block.startswith(('#', '##', '###', '#'*4, '#'*5, '#'*6)):
 		return BlockType.heading
 	if md_block.startswith('```') and md_block.endswith('```'):
@@ -114,11 +323,28 @@ def block_to_html_node_ol(ol:str) -> HTMLNode:
 	children:list[HTMLNode] = list(map(lambda li: LeafNode("li", li.split('.', 1)[1].lstrip()), items))
 	return ParentNode("ol", children)
 
+def block_to_html_node_code(code_block:str) -> HTMLNode:
+	'''
+	A fenced code block: the language after the opening backticks (if any) becomes a "language-..." class,
+	and supported languages are highlighted with <span class="tok-..."> tokens.
+	'''
+	text = code_block[3:-3]
+	language, code = text.split('\n', 1) if '\n' in text else ("", text)
+	language = normalize_language(language.split()[0]) if language.strip() else ""
+	code = textwrap.dedent(code).strip('\n')
+	props = {"class": f"language-{language}"} if language else None
+	tokens = highlight(code, language) if code else None
+	if not tokens:
+		return LeafNode("code", code, props)
+	children:list[HTMLNode] = [CodeNode("span", t, {"class": f"tok-{cls}"}) if cls else CodeNode(None, t)
+								for cls, t in tokens]
+	return ParentNode("code", children, props)
+
 def block_to_html_node(md_block:str, block_type:BlockType) -> HTMLNode:
 	mapping = {
 		BlockType.paragraph: (LeafNode, ("p", md_block)),
 		BlockType.heading: (block_to_html_node_heading, [md_block]),
-		BlockType.code: (LeafNode, ("code", md_block.strip("`").strip())),
+		BlockType.code: (block_to_html_node_code, [md_block]),
 		BlockType.quote: (LeafNode, ("blockquote", "\n".join(line.lstrip('> ') for line in md_block.splitlines()))),
 		BlockType.unordered_list: (block_to_html_node_ul, [md_block]),
 		BlockType.ordered_list: (block_to_html_node_ol, [md_block])
@@ -136,28 +362,45 @@ def htmlnode_to_htmlnode_with_inlines(html_leaf:HTMLNode) -> HTMLNode:
 		new_html = html_leaf
 	else:
 		htmlnodes = list(map(lambda n: text_node_to_html_node(n), textnodes))
-		new_html = ParentNode(html_leaf.tag, htmlnodes)
+		new_html = ParentNode(html_leaf.tag, htmlnodes, html_leaf.props)
 	return new_html
 
-def markdown_to_html_node(markdown:str) -> HTMLNode:
+def markdown_to_html_node(markdown:str, toc:TableOfContents|None=None, includes:Includes|None=None) -> HTMLNode:
 	'''
 	It converts a full markdown document into an HTMLNode.
 	The top-level HTMLNode should just be a <div>, where each child is a block of the document.
 	Each block should have its own "inline" children.
+	Headings get an id, and are added to `toc` when given, in the same pass.
+	Include blocks are resolved with `includes`.
 	'''
+	toc = toc if toc is not None else TableOfContents()
 	md_blocks = markdown_to_blocks(markdown)
-	html_nodes = list(map(lambda b: block_to_html_node(b, block_to_block_type(b)), md_blocks))
-	new_html_nodes = []
-	for hn in html_nodes:
-		# if not hb.value and not hb.children:
-		# 	raise Exception(f'HTMLNode with neither value nor children')
-		if hn.tag == 'code':
-			new_hn = hn
-		elif hn.tag == "ol" or hn.tag == 'ul':
-			assert hn.children
-			hn.children = list(map(lambda li: htmlnode_to_htmlnode_with_inlines(li), hn.children))
-			new_hn = hn
-		else:
-			new_hn = htmlnode_to_htmlnode_with_inlines(hn)
-		new_html_nodes.append(new_hn)
-	return ParentNode("div", new_html_nodes)
+	return ParentNode("div", list(map(lambda b: markdown_block_to_html_node(b, toc, includes), md_blocks)))
+
+def markdown_block_to_html_node(md_block:str, toc:TableOfContents|None=None, includes:Includes|None=None) -> HTMLNode:
+	'''It converts a single markdown block, with its "inline" children, into an HTMLNode.'''
+	block_type = block_to_block_type(md_block)
+	if block_type == BlockType.include:
+		if includes is None:
+			raise Exception(f"include not supported here: {md_block}")
+		match = INCLUDE_RE.fullmatch(md_block)
+		assert match
+		fragment = includes.include(match[1])
+		if toc is not None:
+			renames = toc.extend(fragment.toc_entries)
+			if renames:
+				fragment = fragment.with_ids(renames)
+		return fragment
+	hn = block_to_html_node(md_block, block_type)
+	if block_type == BlockType.heading and toc is not None:
+		assert hn.tag and hn.value is not None
+		hn.props = {"id": toc.add(int(hn.tag[1:]), hn.value)}
+	# if not hb.value and not hb.children:
+	# 	raise Exception(f'HTMLNode with neither value nor children')
+	if hn.tag == 'code':
+		return hn
+	if hn.tag == "ol" or hn.tag == 'ul':
+		assert hn.children
+		hn.children = list(map(lambda li: htmlnode_to_htmlnode_with_inlines(li), hn.children))
+		return hn
+	return htmlnode_to_htmlnode_with_inlines(hn)
@@ -0,0 +1,64 @@
+import os
+import signal
+import threading
+from contextlib import contextmanager
+from htmlnode import HTMLNode
+
+
+class PageLimitExceeded(Exception):
+    pass
+
+
+def count_nodes(node:HTMLNode, limit:int|None=None) -> int:
+    '''It counts the nodes of a tree, stopping as soon as the count goes over `limit`.'''
+    count = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        count += 1
+        if limit is not None and count > limit:
+            break
+        if current.children:
+            stack.extend(current.children)
+    return count
+
+
+class PageLimits:
+    '''
+    Per-page resource budgets; None means no limit.
+    - `max_bytes`: size of the markdown source; split documents are exempt, they are rendered section by section.
+    - `max_nodes`: number of nodes of the page tree; for a split document, of every section page.
+    - `max_seconds`: wall time to generate the page, enforced with a timer signal
+      (only on platforms with `signal.setitimer`, from the main thread). The signal is handled between
+      Python bytecodes, so long C-level work such as a single regex match overruns the limit until it
+      returns; OutputWriter holds it back while publishing a batch.
+    Each check raises PageLimitExceeded.
+    '''
+    def __init__(self, max_bytes:int|None=None, max_nodes:int|None=None, max_seconds:float|None=None) -> None:
+        self.max_bytes = max_bytes
+        self.max_nodes = max_nodes
+        self.max_seconds = max_seconds
+
+    def check_size(self, from_path:str) -> None:
+        if self.max_bytes is not None and os.path.getsize(from_path) > self.max_bytes:
+            raise PageLimitExceeded(f"larger than {self.max_bytes} bytes")
+
+    def check_nodes(self, node:HTMLNode) -> None:
+        if self.max_nodes is not None and count_nodes(node, self.max_nodes) > self.max_nodes:
+            raise PageLimitExceeded(f"more than {self.max_nodes} html nodes")
+
+    @contextmanager
+    def time_limit(self):
+        if (not self.max_seconds or not hasattr(signal, "setitimer")
+                or threading.current_thread() is not threading.main_thread()):
+            yield
+            return
+        def on_timeout(signum, frame):
+            raise PageLimitExceeded(f"took more than {self.max_seconds}s")
+        previous = signal.signal(signal.SIGALRM, on_timeout)
+        signal.setitimer(signal.ITIMER_REAL, self.max_seconds)
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
@@ -1,37 +1,71 @@
 import os
 import shutil
 import re
-from htmlnode import markdown_to_html_node
+import argparse
+import sys
+import time
+from datetime import date
+import buildlog
+from buildlog import log, event, QUIET, SUMMARY
+from bundle import write_archive, write_objects
+from artifacts import PageMeta, load_manifest, save_manifest, write_sitemap, write_feed, write_redirects
+import highlight
+from deps import DependencyManifest
+from limits import PageLimits
+from frontmatter import split_front_matter, scan_front_matter, skip_front_matter
+from htmlnode import markdown_to_html_node, escape_html, TableOfContents, Includes
+from pagination import paginate_markdown, scan_sections, page_paths, section_page_title
+from writer import OutputWriter, prune_directory, swap_directory, load_digests, save_digests
 
+CACHE_DIR = "./.cache"
 
-def log(*msgs):
-    print(*msgs)
 
-def copy_directory(src_dir:str, dst_dir:str):
-    print(f"copying... {src_dir} -> {dst_dir}")
+def copy_directory(src_dir:str, dst_dir:str, writer:OutputWriter|None=None, clean:bool=True):
+    log("copying...", src_dir, "->", dst_dir)
     if not os.path.exists(src_dir):
         raise Exception(f'source directory not found {src_dir}')
-    if os.path.exists(dst_dir):
+    if clean and os.path.islink(dst_dir):
+        # a --swap build published dst_dir as a link to its release directory
+        shutil.rmtree(os.path.realpath(dst_dir))
+        os.remove(dst_dir)
+    elif clean and os.path.exists(dst_dir):
         shutil.rmtree(dst_dir)
     if not os.path.exists(dst_dir):
         create_dir(dst_dir)
+    writer = writer or OutputWriter()
     contents = os.listdir(src_dir)
     for file_or_dir in contents:
         content_src_dir = os.path.join(src_dir, file_or_dir)
         content_dst_dir = os.path.join(dst_dir, file_or_dir)
         if os.path.isfile(content_src_dir):
-            copied_file = shutil.copy(content_src_dir, content_dst_dir)
+            copied_file = writer.copy(content_src_dir, content_dst_dir)
             log("copied", copied_file)
         else:
-            copy_directory(content_src_dir, content_dst_dir)
+            copy_directory(content_src_dir, content_dst_dir, writer, clean)
 
 def extract_title(markdown:str) -> str:
-    for line in markdown.splitlines():
+    meta, markdown = split_front_matter(markdown)
+    if meta.get("title"):
+        return str(meta["title"])
+    return find_title(markdown.splitlines())
+
+def find_title(lines) -> str:
+    for line in lines:
         matches = re.findall(r"^#([^#].*)", line)
         if matches:
             return matches[0].strip()
     raise Exception("No title found")
 
+def page_meta(dest_path:str, title:str, meta:dict, from_path:str) -> PageMeta:
+    '''It builds the page metadata from its front matter, falling back to the source mtime for the date.'''
+    page_date = meta.get("date")
+    if not isinstance(page_date, date):
+        page_date = date.fromtimestamp(os.path.getmtime(from_path))
+    aliases = meta.get("aliases") or []
+    if isinstance(aliases, str):
+        aliases = [aliases]
+    return PageMeta(dest_path, title, page_date, aliases, meta)
+
 def create_dir(directory:str) -> None:
     if os.path.exists(directory):
         return
@@ -40,47 +74,289 @@ def create_dir(directory:str) -> None:
         create_dir(parent)
         os.mkdir(directory)
 
-def generate_page(from_path, template_path, dest_path):
-    log(f"Generating page from {from_path} to {dest_path} using {template_path}")
+def minify_template(template:str) -> str:
+    return "\n".join(line.strip() for line in template.splitlines() if line.strip())
+
+def fill_template(template:str, title:str, html:str, toc:str="") -> str:
+    '''`title` is plain text and gets escaped; `html` and `toc` are already rendered.'''
+    return template.replace('{{ Title }}', escape_html(title)).replace('{{ TOC }}', toc).replace('{{ Content }}', html)
 
+def generate_page(from_path, template_path, dest_path, writer:OutputWriter|None=None, split_bytes:int|None=None,
+                  minify:bool=False, deps:DependencyManifest|None=None, limits:PageLimits|None=None) -> list[PageMeta]:
     if not os.path.exists(from_path) or not os.path.isfile(from_path):
         raise Exception(f'Cannot read "from" from {from_path}')
+    writer = writer or OutputWriter()
+    start = time.perf_counter()
+    fresh_pages = deps.fresh_pages(from_path) if deps is not None else None
+    if fresh_pages is not None:
+        log("Up to date", from_path)
+        for page_path, _ in fresh_pages:
+            writer.keep(page_path)
+        meta = scan_front_matter(from_path)
+        pages = [page_meta(page_path, title, meta, from_path) for page_path, title in fresh_pages]
+        if buildlog.has_events():
+            for page in pages:
+                event(event="page", source=from_path, path=page.dest_path, bytes=os.path.getsize(page.dest_path),
+                      duration_ms=round((time.perf_counter() - start) * 1000, 3), cache_hit=True, written=False)
+        return pages
+    log("Generating page from", from_path, "to", dest_path, "using", template_path)
+
     if not os.path.exists(template_path) or not os.path.isfile(template_path):
         raise Exception(f'Cannot read "template" from {template_path}') 
-    with open(from_path) as from_file:
-        markdown = from_file.read()
     with open(template_path) as template_file:
         template = template_file.read()
-    html = markdown_to_html_node(markdown).to_html()
-    title = extract_title(markdown)
-    template = template.replace('{{ Title }}', title).replace('{{ Content }}', html)
+    if minify:
+        template = minify_template(template)
     if not os.path.exists(dest_path):
         parent = os.path.dirname(dest_path)
         if not os.path.exists(parent):
             create_dir(parent)
-    with open(dest_path, 'w') as dest_file:
-        dest_file.write(template)
+    includes = Includes(from_path)
+    if split_bytes is not None and os.path.getsize(from_path) > split_bytes:
+        meta = scan_front_matter(from_path)
+        pages = []
+        for page_path, title, html, toc_html in paginate_markdown(from_path, dest_path, meta.get("title"), minify, includes, limits):
+            page_html = fill_template(template, title, html, toc_html)
+            written = writer.write(page_path, page_html)
+            pages.append(page_meta(page_path, title, meta, from_path))
+            if buildlog.has_events():
+                event(event="page", source=from_path, path=page_path, bytes=len(page_html.encode()),
+                      duration_ms=round((time.perf_counter() - start) * 1000, 3), cache_hit=False, written=written)
+                start = time.perf_counter()
+    else:
+        if limits is not None:
+            limits.check_size(from_path)
+        with open(from_path) as from_file:
+            meta, markdown = split_front_matter(from_file.read())
+        toc = TableOfContents()
+        node = markdown_to_html_node(markdown, toc, includes)
+        if limits is not None:
+            limits.check_nodes(node)
+        html = node.to_html(minify)
+        title = str(meta["title"]) if meta.get("title") else find_title(markdown.splitlines())
+        page_html = fill_template(template, title, html, toc.to_html(minify))
+        written = writer.write(dest_path, page_html)
+        pages = [page_meta(dest_path, title, meta, from_path)]
+        if buildlog.has_events():
+            event(event="page", source=from_path, path=dest_path, bytes=len(page_html.encode()),
+                  duration_ms=round((time.perf_counter() - start) * 1000, 3), cache_hit=False, written=written)
+    if deps is not None:
+        deps.record(from_path, [from_path, template_path, *sorted(includes.deps)], [(p.dest_path, p.title) for p in pages])
+    return pages
+
+def scan_page(from_path:str, dest_path:str, split_bytes:int|None=None) -> list[PageMeta]:
+    '''
+    Metadata-only counterpart of generate_page: it reads the front matter of the file and,
+    only if it has no title, its lines up to the first h1. The body is never parsed.
+    '''
+    meta = scan_front_matter(from_path)
+    if split_bytes is not None and os.path.getsize(from_path) > split_bytes:
+        first_h1, section_titles = scan_sections(from_path)
+        title = str(meta["title"]) if meta.get("title") else first_h1
+        if title is None:
+            raise Exception("No title found")
+        paths = page_paths(dest_path, len(section_titles))
+        return [page_meta(path, section_page_title(title, section_titles, i), meta, from_path)
+                for i, path in enumerate(paths)]
+    if meta.get("title"):
+        title = str(meta["title"])
+    else:
+        with open(from_path) as from_file:
+            title = find_title(skip_front_matter(from_file))
+    return [page_meta(dest_path, title, meta, from_path)]
+
+def keep_previous_pages(from_path:str, dest_path:str, writer:OutputWriter, split_bytes:int|None=None,
+                        deps:DependencyManifest|None=None) -> list[PageMeta]:
+    '''
+    After `from_path` failed: the pages it produced in a previous build stay published, and listed in the
+    artifacts, instead of being pruned, so one bad edit does not take a live page down.
+    They are the pages recorded in `deps`, else the ones `scan_page` finds for `dest_path`.
+    '''
+    recorded = deps.recorded_pages(from_path) if deps is not None else None
+    try:
+        if recorded:
+            meta = scan_front_matter(from_path)
+            previous = [page_meta(page_path, title, meta, from_path) for page_path, title in recorded]
+        else:
+            previous = scan_page(from_path, dest_path, split_bytes)
+    except Exception:
+        previous = [page_meta(page_path, title, {}, from_path) for page_path, title in recorded or []]
+    if not previous and os.path.exists(dest_path):
+        writer.keep(dest_path)
+    kept = [page for page in previous if os.path.exists(page.dest_path)]
+    for page in kept:
+        writer.keep(page.dest_path)
+        log("Kept previous", page.dest_path)
+    return kept
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, writer:OutputWriter|None=None, split_bytes:int|None=None,
+                             minify:bool=False, deps:DependencyManifest|None=None, limits:PageLimits|None=None,
+                             failures:list[tuple[str, str]]|None=None) -> list[PageMeta]:
+    '''
+    Files and directories starting with "_" (e.g. fragments to include) are not pages.
+    With `failures`, a page that fails (or goes over `limits`) is skipped and recorded there
+    as (source path, error) instead of aborting the build; its previous output, if any, is kept.
+    '''
     if not os.path.exists(dir_path_content):
         raise Exception(f'content directory not found {dir_path_content}')
     if not os.path.exists(template_path):
         raise Exception(f'template directory not found {template_path}')
     if not os.path.exists(dest_dir_path):
         create_dir(dest_dir_path)
+    writer = writer or OutputWriter()
+    limits = limits or PageLimits()
+    pages = []
     contents = os.listdir(dir_path_content)
     for file_or_dir in contents:
+        if file_or_dir.startswith("_"):
+            continue
         content_src_dir = os.path.join(dir_path_content, file_or_dir)
         content_dst_dir = os.path.join(dest_dir_path, file_or_dir)
         if os.path.isfile(content_src_dir):
             if file_or_dir.split(".")[-1] == 'md':
-                generate_page(content_src_dir, template_path, content_dst_dir[:-len(".md")]+".html")
+                try:
+                    with limits.time_limit():
+                        pages += generate_page(content_src_dir, template_path, content_dst_dir[:-len(".md")]+".html",
+                                               writer, split_bytes, minify, deps, limits)
+                except Exception as e:
+                    if failures is None:
+                        raise
+                    failures.append((content_src_dir, str(e)))
+                    log("Failed", content_src_dir, e)
+                    pages += keep_previous_pages(content_src_dir, content_dst_dir[:-len(".md")]+".html", writer,
+                                                 split_bytes, deps)
         else:
-            generate_pages_recursive(content_src_dir, template_path, content_dst_dir)
+            pages += generate_pages_recursive(content_src_dir, template_path, content_dst_dir, writer, split_bytes, minify, deps,
+                                              limits, failures)
+    return pages
+
+def scan_pages_recursive(dir_path_content, dest_dir_path, split_bytes:int|None=None) -> list[PageMeta]:
+    if not os.path.exists(dir_path_content):
+        raise Exception(f'content directory not found {dir_path_content}')
+    pages = []
+    contents = os.listdir(dir_path_content)
+    for file_or_dir in contents:
+        if file_or_dir.startswith("_"):
+            continue
+        content_src_dir = os.path.join(dir_path_content, file_or_dir)
+        content_dst_dir = os.path.join(dest_dir_path, file_or_dir)
+        if os.path.isfile(content_src_dir):
+            if file_or_dir.split(".")[-1] == 'md':
+                pages += scan_page(content_src_dir, content_dst_dir[:-len(".md")]+".html", split_bytes)
+        else:
+            pages += scan_pages_recursive(content_src_dir, content_dst_dir, split_bytes)
+    return pages
+
+def generate_artifacts(pages:list[PageMeta], base_url:str, dest_dir:str, writer:OutputWriter, author:str|None=None) -> None:
+    '''It writes the sitemap, feed and redirects from the collected page metadata, updating only what changed.'''
+    manifest_path = os.path.join(CACHE_DIR, "artifacts.json")
+    manifest = load_manifest(manifest_path)
+    shards = write_sitemap(pages, base_url, dest_dir, manifest, writer)
+    feed = write_feed(pages, base_url, dest_dir, manifest, writer, author=author)
+    redirects = write_redirects(pages, dest_dir, manifest, writer)
+    log("Artifacts:", shards, "sitemap shards,", int(feed), "feed,", redirects, "redirects written", level=SUMMARY)
+    save_manifest(manifest_path, manifest, OutputWriter())
 
 def main():
-    copy_directory("./static", "./public")
-    generate_pages_recursive("content", "template.html", "public")
+    parser = argparse.ArgumentParser(description="Static site generator")
+    parser.add_argument("--durable", action="store_true",
+                        help="fsync outputs, batched per directory, before publishing them")
+    parser.add_argument("--swap", action="store_true",
+                        help="build into a staging directory and swap it with public/ at the end")
+    parser.add_argument("--split-bytes", type=int, default=None,
+                        help="split markdown files larger than this into one page per h1/h2 section")
+    parser.add_argument("--minify", action="store_true",
+                        help="collapse whitespace in the rendered html (except in code)")
+    parser.add_argument("--differential", action="store_true",
+                        help="keep public/, do not rewrite files whose content did not change, and remove the files no longer generated")
+    parser.add_argument("--incremental", action="store_true",
+                        help="like --differential, and only rebuild pages whose source, template or included fragments changed")
+    parser.add_argument("--base-url", type=str, default=None,
+                        help="site url; when given, sitemap.xml, feed.xml and _redirects are generated")
+    parser.add_argument("--author", type=str, default=None,
+                        help="feed author; defaults to the `author` front matter of the home page, else the site title")
+    parser.add_argument("--bundle", choices=["archive", "objects"], default=None,
+                        help="also pack public/ as a single archive (public.bundle) or a content-addressed store (public.objects/)")
+    parser.add_argument("--metadata-only", action="store_true",
+                        help="only scan front matter and regenerate sitemap, feed and redirects in public/")
+    parser.add_argument("--max-page-bytes", type=int, default=None,
+                        help="skip pages whose markdown is larger than this (split documents are exempt)")
+    parser.add_argument("--max-page-nodes", type=int, default=None,
+                        help="skip pages whose html tree has more nodes than this (each page of a split document is checked)")
+    parser.add_argument("--max-page-seconds", type=float, default=None,
+                        help="skip pages that take longer than this to generate (checked between python steps: "
+                             "a long C-level call such as one regex match can overrun it)")
+    parser.add_argument("--fail-fast", action="store_true",
+                        help="stop at the first page that fails instead of reporting all failures at the end")
+    parser.add_argument("--log-level", choices=list(buildlog.LEVELS), default="summary",
+                        help="quiet: errors only, summary: one line per build step, verbose: one line per file")
+    parser.add_argument("--events", type=str, default=None,
+                        help="write a json-lines event per page (path, bytes, duration, cache hit) to this file")
+    args = parser.parse_args()
+
+    buildlog.configure(buildlog.LEVELS[args.log_level], args.events)
+    try:
+        failures = build(args, parser)
+    finally:
+        buildlog.close()
+    if failures:
+        sys.exit(1)
+
+def build(args, parser) -> list[tuple[str, str]]:
+    '''It builds the site and returns the pages that failed as (source path, error).'''
+    start = time.perf_counter()
+    highlight.configure_cache(os.path.join(CACHE_DIR, "highlight"))
+    if args.metadata_only:
+        if not args.base_url:
+            parser.error("--metadata-only requires --base-url")
+        pages = scan_pages_recursive("content", "./public", args.split_bytes)
+        with OutputWriter(durable=args.durable) as writer:
+            generate_artifacts(pages, args.base_url.rstrip('/'), "./public", writer, args.author)
+        return []
+
+    differential = args.differential or args.incremental
+    if args.swap and differential:
+        parser.error("--swap rebuilds everything in a staging directory, it cannot be --differential or --incremental")
+    dest_dir = "./public.staging" if args.swap else "./public"
+    deps = None
+    if args.incremental:
+        options = {"split_bytes": args.split_bytes, "minify": args.minify}
+        deps = DependencyManifest(os.path.join(CACHE_DIR, "deps.json"), options)
+    digests_path = os.path.join(CACHE_DIR, "digests.json")
+    digests = load_digests(digests_path) if differential else None
+    limits = PageLimits(args.max_page_bytes, args.max_page_nodes, args.max_page_seconds)
+    failures = None if args.fail_fast else []
+    with OutputWriter(durable=args.durable, digests=digests) as writer:
+        copy_directory("./static", dest_dir, writer, clean=not differential)
+        pages = generate_pages_recursive("content", "template.html", dest_dir, writer, args.split_bytes, args.minify, deps,
+                                         limits, failures)
+        if deps is not None:
+            deps.remove_unseen()
+            deps.save(OutputWriter())
+        if args.base_url:
+            generate_artifacts(pages, args.base_url.rstrip('/'), dest_dir, writer, args.author)
+    if differential:
+        # outputs of deleted pages, aliases and static files: whatever this build neither wrote nor kept
+        for stale_path in prune_directory(dest_dir, writer.outputs):
+            log("Removed", stale_path)
+    log(len(pages), "pages,", writer.written, "files written,", writer.unchanged, "unchanged,",
+        highlight.cache.hits, "highlight cache hits in", f"{time.perf_counter() - start:.2f}s", level=SUMMARY)
+    if digests is not None:
+        save_digests(digests_path, digests)
+    if args.swap:
+        swap_directory(dest_dir, "./public")
+    if args.bundle == "archive":
+        blobs = write_archive("./public", "./public.bundle")
+        log("Bundled public/ into public.bundle,", blobs, "distinct files", level=SUMMARY)
+    elif args.bundle == "objects":
+        with OutputWriter(durable=args.durable) as writer:
+            objects = write_objects("./public", "./public.objects", writer)
+        log("Bundled public/ into public.objects/,", objects, "new objects", level=SUMMARY)
+    if failures:
+        log(len(failures), "pages failed:", level=QUIET)
+        for from_path, error in failures:
+            log(f"  {from_path}: {error}", level=QUIET)
+    return failures or []
 
 if __name__ == "__main__":
     main()
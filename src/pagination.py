@@ -0,0 +1,106 @@
+import os
+from typing import Iterator
+from frontmatter import skip_front_matter
+from htmlnode import (HTMLNode, LeafNode, ParentNode, BlockType, TableOfContents, Includes, block_to_block_type,
+                      iter_markdown_blocks, markdown_block_to_html_node)
+from limits import PageLimits
+
+SPLIT_LEVEL = 2
+
+
+def heading_level(md_block:str) -> int:
+    '''It returns the level of a heading block, or 0 if the block is not a heading.'''
+    if block_to_block_type(md_block) != BlockType.heading:
+        return 0
+    return len(md_block) - len(md_block.lstrip('#'))
+
+def heading_text(md_block:str) -> str:
+    return md_block.splitlines()[0].lstrip('# ').strip()
+
+def is_section_start(md_block:str) -> bool:
+    return 0 < heading_level(md_block) <= SPLIT_LEVEL
+
+def iter_sections(md_blocks:Iterator[str]) -> Iterator[list[str]]:
+    '''
+    It groups a stream of blocks into sections, starting a new one at every h1/h2 heading.
+    Blocks before the first heading belong to the first section.
+    '''
+    section: list[str] = []
+    has_heading = False
+    for md_block in md_blocks:
+        starts = is_section_start(md_block)
+        if starts and has_heading:
+            yield section
+            section = []
+        section.append(md_block)
+        has_heading = has_heading or starts
+    if section:
+        yield section
+
+def scan_sections(from_path:str) -> tuple[str|None, list[str]]:
+    '''
+    First (cheap) pass: it returns the document title (its first h1, if any) and the title of
+    every section, looking only at heading blocks.
+    '''
+    title = None
+    section_titles = []
+    with open(from_path) as from_file:
+        for section in iter_sections(iter_markdown_blocks(skip_front_matter(from_file))):
+            headings = [b for b in section if is_section_start(b)]
+            section_titles.append(heading_text(headings[0]) if headings else "")
+            if title is None:
+                title = next((heading_text(b) for b in headings if heading_level(b) == 1), None)
+    return title, section_titles
+
+def page_paths(dest_path:str, count:int) -> list[str]:
+    '''The first page keeps `dest_path`, the next ones get a `-2`, `-3`... suffix.'''
+    stem, ext = os.path.splitext(dest_path)
+    return [dest_path] + [f"{stem}-{i}{ext}" for i in range(2, count + 1)]
+
+def section_page_title(title:str, section_titles:list[str], i:int) -> str:
+    return title if i == 0 or not section_titles[i] else f"{title} - {section_titles[i]}"
+
+def toc_html_node(section_titles:list[str], paths:list[str], current:int) -> HTMLNode:
+    items: list[HTMLNode] = []
+    for i, (section_title, path) in enumerate(zip(section_titles, paths)):
+        props = {"href": os.path.basename(path)}
+        if i == current:
+            props["aria-current"] = "page"
+        items.append(ParentNode("li", [LeafNode("a", section_title or f"Part {i + 1}", props)]))
+    return ParentNode("nav", [ParentNode("ol", items)], {"class": "sections"})
+
+def pagination_html_node(paths:list[str], current:int) -> HTMLNode:
+    links: list[HTMLNode] = []
+    if current > 0:
+        links.append(LeafNode("a", "Previous", {"href": os.path.basename(paths[current - 1]), "rel": "prev"}))
+    links.append(LeafNode("span", f"{current + 1} / {len(paths)}"))
+    if current < len(paths) - 1:
+        links.append(LeafNode("a", "Next", {"href": os.path.basename(paths[current + 1]), "rel": "next"}))
+    return ParentNode("nav", links, {"class": "pagination"})
+
+def paginate_markdown(from_path:str, dest_path:str, title:str|None=None, minify:bool=False,
+                      includes:Includes|None=None, limits:PageLimits|None=None) -> Iterator[tuple[str, str, str, str]]:
+    '''
+    It splits a large markdown document at its h1/h2 headings into several pages.
+    It yields (dest_path, title, content html, toc html) for every page, reading and rendering one
+    section at a time so the whole document is never held in memory.
+    The document title is `title` if given (e.g. from front matter), else its first h1.
+    `limits.max_nodes` applies to every section, since each one is a page.
+    '''
+    first_h1, section_titles = scan_sections(from_path)
+    title = title or first_h1
+    if title is None:
+        raise Exception("No title found")
+    paths = page_paths(dest_path, len(section_titles))
+    with open(from_path) as from_file:
+        sections = iter_sections(iter_markdown_blocks(skip_front_matter(from_file)))
+        for i, section in enumerate(sections):
+            nav = pagination_html_node(paths, i).to_html(minify)
+            toc = TableOfContents()
+            nodes = [markdown_block_to_html_node(b, toc, includes) for b in section]
+            if limits is not None:
+                limits.check_nodes(ParentNode("div", nodes))
+            content = "".join(node.to_html(minify) for node in nodes)
+            html = (toc_html_node(section_titles, paths, i).to_html(minify)
+                    + nav + f"<div>{content}</div>" + nav)
+            yield paths[i], section_page_title(title, section_titles, i), html, toc.to_html(minify)
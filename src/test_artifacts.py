@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from artifacts import PageMeta, page_url, write_sitemap, write_feed, write_redirects
+from writer import OutputWriter
+
+
+class TestPageUrl(unittest.TestCase):
+    def test_page_url(self):
+        self.assertEqual(page_url("public/index.html", "public"), "/")
+        self.assertEqual(page_url("public/majesty/index.html", "public"), "/majesty/")
+        self.assertEqual(page_url("public/api-2.html", "public"), "/api-2.html")
+
+
+class TestArtifacts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.writer = OutputWriter()
+        self.pages = [PageMeta(os.path.join(self.dir, f"p{i}.html"), f"Page {i}", date(2024, 1, i + 1))
+                      for i in range(5)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sitemap_shards(self):
+        manifest = {}
+        written = write_sitemap(self.pages, "https://example.com", self.dir, manifest, self.writer, shard_size=2)
+        self.assertEqual(written, 3)
+        with open(os.path.join(self.dir, "sitemap.xml")) as f:
+            index = f.read()
+        self.assertIn("<loc>https://example.com/sitemap-2.xml</loc>", index)
+        with open(os.path.join(self.dir, "sitemap-0.xml")) as f:
+            shard = f.read()
+        self.assertIn("<url><loc>https://example.com/p0.html</loc><lastmod>2024-01-01T00:00:00Z</lastmod></url>", shard)
+
+    def test_sitemap_incremental(self):
+        manifest = {}
+        write_sitemap(self.pages, "https://example.com", self.dir, manifest, self.writer, shard_size=2)
+        self.pages[3].date = date(2024, 2, 1)
+        written = write_sitemap(self.pages, "https://example.com", self.dir, manifest, self.writer, shard_size=2)
+        self.assertEqual(written, 1)
+        written = write_sitemap(self.pages, "https://example.com", self.dir, manifest, self.writer, shard_size=2)
+        self.assertEqual(written, 0)
+
+    def test_sitemap_base_url_changed(self):
+        manifest = {}
+        write_sitemap(self.pages, "https://a.com", self.dir, manifest, self.writer, shard_size=2)
+        written = write_sitemap(self.pages, "https://b.com", self.dir, manifest, self.writer, shard_size=2)
+        self.assertEqual(written, 3)
+        for name in ("sitemap.xml", "sitemap-0.xml"):
+            with open(os.path.join(self.dir, name)) as f:
+                self.assertNotIn("https://a.com", f.read())
+
+    def test_sitemap_removed_page(self):
+        manifest = {}
+        write_sitemap(self.pages, "https://example.com", self.dir, manifest, self.writer, shard_size=2)
+        written = write_sitemap(self.pages[:4], "https://example.com", self.dir, manifest, self.writer, shard_size=2)
+        self.assertEqual(written, 0)
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "sitemap-2.xml")))
+
+    def test_feed(self):
+        manifest = {}
+        self.assertTrue(write_feed(self.pages, "https://example.com", self.dir, manifest, self.writer, size=2))
+        self.assertFalse(write_feed(self.pages, "https://example.com", self.dir, manifest, self.writer, size=2))
+        with open(os.path.join(self.dir, "feed.xml")) as f:
+            feed = f.read()
+        self.assertIn("<title>Page 4</title>", feed)
+        self.assertIn("<title>Page 3</title>", feed)
+        self.assertNotIn("<title>Page 2</title>", feed)
+        self.assertIn("<author><name>https://example.com</name></author>", feed)
+
+    def test_feed_author(self):
+        self.pages.append(PageMeta(os.path.join(self.dir, "index.html"), "Home", date(2023, 1, 1), meta={"author": "Tolkien"}))
+        self.pages[4].meta = {"author": "Christopher"}
+        write_feed(self.pages, "https://example.com", self.dir, {}, self.writer)
+        with open(os.path.join(self.dir, "feed.xml")) as f:
+            feed = f.read()
+        self.assertIn("<updated>2024-01-05T00:00:00Z</updated><author><name>Tolkien</name></author>\n<entry>", feed)
+        self.assertIn("<author><name>Christopher</name></author></entry>", feed)
+        write_feed(self.pages, "https://example.com", self.dir, {}, self.writer, author="J. R. R.")
+        with open(os.path.join(self.dir, "feed.xml")) as f:
+            self.assertIn("<author><name>J. R. R.</name></author>\n", f.read())
+
+    def test_redirects(self):
+        manifest = {}
+        self.pages[0].aliases = ["/old/"]
+        self.assertEqual(write_redirects(self.pages, self.dir, manifest, self.writer), 1)
+        self.assertEqual(write_redirects(self.pages, self.dir, manifest, self.writer), 0)
+        with open(os.path.join(self.dir, "_redirects")) as f:
+            self.assertEqual(f.read(), "/old/ /p0.html 301\n")
+        self.assertTrue(os.path.exists(os.path.join(self.dir, "old", "index.html")))
+
+    def test_alias_replaced_by_page(self):
+        manifest = {}
+        self.pages[0].aliases = ["/old/"]
+        write_redirects(self.pages, self.dir, manifest, self.writer)
+        old_page = os.path.join(self.dir, "old", "index.html")
+        self.pages[0].aliases = []
+        self.pages.append(PageMeta(old_page, "Old", date(2024, 2, 1)))
+        self.writer.write(old_page, "<p>real page</p>")
+        write_redirects(self.pages, self.dir, manifest, self.writer)
+        with open(old_page) as f:
+            self.assertEqual(f.read(), "<p>real page</p>")
+
+    def test_alias_removed(self):
+        manifest = {}
+        self.pages[0].aliases = ["/old/"]
+        write_redirects(self.pages, self.dir, manifest, self.writer)
+        self.pages[0].aliases = []
+        write_redirects(self.pages, self.dir, manifest, self.writer)
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "old", "index.html")))
+
+    def test_invalid_aliases(self):
+        self.pages[0].aliases = ["/p1.html"]
+        with self.assertRaises(Exception):
+            write_redirects(self.pages, self.dir, {}, self.writer)
+        self.pages[0].aliases = ["/../escaped/"]
+        with self.assertRaises(Exception):
+            write_redirects(self.pages, self.dir, {}, self.writer)
+        self.assertFalse(os.path.exists(os.path.join(os.path.dirname(self.dir), "escaped")))
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "_redirects")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from buildlog import BuildLog, QUIET, SUMMARY, VERBOSE
+
+
+class TestBuildLog(unittest.TestCase):
+    def test_levels(self):
+        stream = io.StringIO()
+        build_log = BuildLog(SUMMARY, stream)
+        build_log.log(VERBOSE, "copied", "a.css")
+        build_log.log(SUMMARY, 2, "pages")
+        build_log.log(QUIET, "error")
+        build_log.flush()
+        self.assertEqual(stream.getvalue(), "2 pages\nerror\n")
+
+    def test_buffered(self):
+        stream = io.StringIO()
+        build_log = BuildLog(VERBOSE, stream, buffer_size=10)
+        build_log.log(VERBOSE, "short")
+        self.assertEqual(stream.getvalue(), "")
+        build_log.log(VERBOSE, "long enough")
+        self.assertEqual(stream.getvalue(), "short\nlong enough\n")
+
+    def test_events(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            events_path = os.path.join(tmp, "events.jsonl")
+            build_log = BuildLog(QUIET, io.StringIO(), events_path)
+            self.assertTrue(build_log.has_events)
+            build_log.event(event="page", path="public/index.html", bytes=10, cache_hit=False)
+            build_log.close()
+            with open(events_path) as f:
+                events = [json.loads(line) for line in f]
+        self.assertListEqual(events, [{"event": "page", "path": "public/index.html", "bytes": 10, "cache_hit": False}])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from bundle import Bundle, write_archive, write_objects
+
+
+class TestBundle(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.site = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.site, "majesty"))
+        files = {"index.html": b"<p>home</p>", "majesty/index.html": b"<p>majesty</p>",
+                 "copy.html": b"<p>home</p>", "empty.txt": b"", "a b.html": b"<p>space</p>"}
+        for rel_path, data in files.items():
+            with open(os.path.join(self.site, rel_path), 'wb') as f:
+                f.write(data)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_bundle(self, bundle):
+        self.assertEqual(bytes(bundle.read(bundle.resolve("/"))), b"<p>home</p>")
+        self.assertEqual(bytes(bundle.read(bundle.resolve("/majesty/"))), b"<p>majesty</p>")
+        self.assertEqual(bytes(bundle.read(bundle.resolve("/majesty?x=1"))), b"<p>majesty</p>")
+        self.assertEqual(bytes(bundle.read(bundle.resolve("/copy.html"))), b"<p>home</p>")
+        self.assertEqual(bytes(bundle.read(bundle.resolve("/empty.txt"))), b"")
+        self.assertEqual(bundle.resolve("/a%20b.html"), "a b.html")
+        self.assertIsNone(bundle.resolve("/missing.html"))
+
+    def test_archive(self):
+        archive_path = os.path.join(self.tmp.name, "public.bundle")
+        self.assertEqual(write_archive(self.site, archive_path), 4)
+        self.check_bundle(Bundle(archive_path))
+
+    def test_objects(self):
+        objects_dir = os.path.join(self.tmp.name, "public.objects")
+        self.assertEqual(write_objects(self.site, objects_dir), 4)
+        self.assertEqual(write_objects(self.site, objects_dir), 0)
+        self.check_bundle(Bundle(objects_dir))
+
+    def test_objects_bounded_maps(self):
+        objects_dir = os.path.join(self.tmp.name, "public.objects")
+        write_objects(self.site, objects_dir)
+        bundle = Bundle(objects_dir, mmap_threshold=1, max_maps=1)
+        self.check_bundle(bundle)
+        self.assertEqual(len(bundle._maps), 1)
+        small = Bundle(objects_dir)
+        self.check_bundle(small)
+        self.assertEqual(len(small._maps), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from deps import DependencyManifest
+from writer import OutputWriter
+
+
+class TestDependencyManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.manifest_path = os.path.join(self.dir, "cache", "deps.json")
+        self.page = self.touch("page.md")
+        self.fragment = self.touch("_warn.md")
+        self.dest = self.touch("page.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def touch(self, name, mtime=1_000_000_000):
+        path = os.path.join(self.dir, name)
+        open(path, "w").close()
+        os.utime(path, ns=(mtime, mtime))
+        return path
+
+    def record(self, options):
+        deps = DependencyManifest(self.manifest_path, options)
+        deps.record(self.page, [self.page, self.fragment], [(self.dest, "Page")])
+        deps.save(OutputWriter())
+
+    def test_fresh(self):
+        self.record({})
+        deps = DependencyManifest(self.manifest_path, {})
+        self.assertListEqual(deps.fresh_pages(self.page), [(self.dest, "Page")])
+
+    def test_fragment_changed(self):
+        self.record({})
+        self.touch("_warn.md", mtime=2_000_000_000)
+        deps = DependencyManifest(self.manifest_path, {})
+        self.assertIsNone(deps.fresh_pages(self.page))
+
+    def test_output_missing(self):
+        self.record({})
+        os.remove(self.dest)
+        self.assertIsNone(DependencyManifest(self.manifest_path, {}).fresh_pages(self.page))
+
+    def test_options_changed(self):
+        self.record({"minify": False})
+        self.assertIsNone(DependencyManifest(self.manifest_path, {"minify": True}).fresh_pages(self.page))
+
+    def test_remove_unseen(self):
+        self.record({})
+        deps = DependencyManifest(self.manifest_path, {})
+        deps.remove_unseen()
+        self.assertIsNone(deps.recorded_pages(self.page))
+
+if __name__ == "__main__":
+    unittest.main()
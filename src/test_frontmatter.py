@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timezone
+
+from frontmatter import parse_front_matter, split_front_matter, skip_front_matter, scan_front_matter
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_parse_front_matter(self):
+        lines = """title: "Hello: world"
+date: 2024-03-01
+updated: 2024-03-02T10:30:00Z
+draft: false
+weight: 3
+# a comment
+tags: [python, "static, sites"]
+aliases:
+  - /old/
+  - /older.html
+""".splitlines()
+        meta = parse_front_matter(lines)
+        expected_meta = {
+            "title": "Hello: world",
+            "date": date(2024, 3, 1),
+            "updated": datetime(2024, 3, 2, 10, 30, tzinfo=timezone.utc),
+            "draft": False,
+            "weight": 3,
+            "tags": ["python", "static, sites"],
+            "aliases": ["/old/", "/older.html"],
+        }
+        self.assertDictEqual(meta, expected_meta)
+
+    def test_parse_front_matter_invalid(self):
+        with self.assertRaises(Exception):
+            parse_front_matter(["not a pair"])
+
+    def test_split_front_matter(self):
+        md = "---\ntitle: Page\n---\n# Heading\n\ntext\n"
+        meta, body = split_front_matter(md)
+        self.assertDictEqual(meta, {"title": "Page"})
+        self.assertEqual(body, "# Heading\n\ntext\n")
+
+    def test_split_no_front_matter(self):
+        md = "# Heading\n\n---\n"
+        self.assertEqual(split_front_matter(md), ({}, md))
+
+    def test_split_unclosed(self):
+        with self.assertRaises(Exception):
+            split_front_matter("---\ntitle: Page\n# Heading\n")
+
+    def test_skip_front_matter(self):
+        lines = ["---\n", "title: Page\n", "---\n", "# Heading\n"]
+        self.assertListEqual(list(skip_front_matter(iter(lines))), ["# Heading\n"])
+        self.assertListEqual(list(skip_front_matter(iter(lines[3:]))), ["# Heading\n"])
+
+    def test_scan_front_matter(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, 'w') as f:
+                f.write("---\ntitle: Page\ndate: 2024-01-02\n---\n# Heading\n")
+            self.assertDictEqual(scan_front_matter(path), {"title": "Page", "date": date(2024, 1, 2)})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import re
+import unittest
+from unittest import mock
+
+from highlight import HighlightCache, LEXERS, tokenize
+from htmlnode import LeafNode, ParentNode, CodeNode, block_to_html_node_code
+
+
+class TestTokenize(unittest.TestCase):
+    def test_tokenize_python(self):
+        code = 'def f(x):  # add\n    return x + 1 or "a#b"'
+        tokens = tokenize(code, "python")
+        expected_tokens = [
+            ("keyword", "def"), (None, " f(x):  "), ("comment", "# add"), (None, "\n    "),
+            ("keyword", "return"), (None, " x + "), ("number", "1"), (None, " "), ("keyword", "or"),
+            (None, " "), ("string", '"a#b"'),
+        ]
+        self.assertListEqual(tokens, expected_tokens)
+
+    def test_tokenize_shell(self):
+        code = 'echo "$HOME" --verbose $USER # done'
+        tokens = tokenize(code, "shell")
+        expected_tokens = [
+            ("builtin", "echo"), (None, " "), ("string", '"$HOME"'), (None, " "), ("option", "--verbose"),
+            (None, " "), ("variable", "$USER"), (None, " "), ("comment", "# done"),
+        ]
+        self.assertListEqual(tokens, expected_tokens)
+
+
+class TestHighlightCache(unittest.TestCase):
+    def test_cache_on_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = HighlightCache(tmp)
+            tokens = cache.get("python", "pass")
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+            self.assertEqual(cache.get("python", "pass"), tokens)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            other_build = HighlightCache(tmp)
+            self.assertEqual(other_build.get("python", "pass"), tokens)
+            self.assertEqual((other_build.hits, other_build.misses), (1, 0))
+            self.assertEqual(len(os.listdir(tmp)), 1)
+
+    def test_lexer_change_invalidates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            HighlightCache(tmp).get("python", "pass")
+            lexer = re.compile(LEXERS["python"].pattern.replace("|pass|", "|"), re.MULTILINE)
+            with mock.patch.dict(LEXERS, {"python": lexer}):
+                changed = HighlightCache(tmp)
+                self.assertEqual(changed.get("python", "pass"), [(None, "pass")])
+                self.assertEqual((changed.hits, changed.misses), (0, 1))
+
+
+class TestCodeBlock(unittest.TestCase):
+    def test_code_block_python(self):
+        node = block_to_html_node_code("```python\nx = '<&copy;>'\n```")
+        expected_node = ParentNode("code", [
+            CodeNode(None, "x = "), CodeNode("span", "'<&copy;>'", {"class": "tok-string"}),
+        ], {"class": "language-python"})
+        self.assertEqual(node, expected_node)
+        html = '<code class="language-python">x = <span class="tok-string">\'&lt;&amp;copy;&gt;\'</span></code>'
+        self.assertEqual(node.to_html(minify=True), html)
+
+    def test_code_block_unsupported(self):
+        node = block_to_html_node_code("```rust\nfn main() {}\n```")
+        self.assertEqual(node, LeafNode("code", "fn main() {}", {"class": "language-rust"}))
+
+    def test_code_block_no_language(self):
+        node = block_to_html_node_code("```\n    indented\nnot\n```")
+        self.assertEqual(node, LeafNode("code", "    indented\nnot"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
+import os
+import tempfile
 import unittest
 
 from htmlnode import (HTMLNode, LeafNode, ParentNode, markdown_to_blocks, 
                       block_to_block_type, BlockType, block_to_html_node,
-                      markdown_to_html_node)
+                      markdown_to_html_node, TableOfContents, Includes)
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -28,8 +30,29 @@ class TestLeafNode(unittest.TestCase):
         node = LeafNode("img", "", {"src": "/images/rivendell.png", "alt":"LOTR image artistmonkeys"})
         html = '<img src="/images/rivendell.png" alt="LOTR image artistmonkeys"></img>'
         self.assertEqual(node.to_html(), html)
+    def test_to_html_escaped(self):
+        node = LeafNode("p", "a < b && c > d &copy; &#169;", {"title": 'say "hi" & <bye>'})
+        html = '<p title="say &quot;hi&quot; &amp; &lt;bye&gt;">a &lt; b &amp;&amp; c &gt; d &copy; &#169;</p>'
+        self.assertEqual(node.to_html(), html)
+    def test_to_html_escaped_code(self):
+        node = LeafNode("code", "if a < b:\n    print(\"&copy;\")")
+        html = '<code>if a &lt; b:\n    print("&amp;copy;")</code>'
+        self.assertEqual(node.to_html(), html)
+    def test_to_html_reassigned(self):
+        node = LeafNode("a", "<one>", {"href": "/1"})
+        node.to_html()
+        node.value = "<two>"
+        node.props = {"href": "/2"}
+        self.assertEqual(node.to_html(), '<a href="/2">&lt;two&gt;</a>')
 
 class TestParentNode(unittest.TestCase):
+    def test_to_html_minify(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "some\n   text  "), LeafNode("i", "in\n\nitalic")]),
+            LeafNode("code", "keep\n    indented"),
+        ])
+        html = '<div><p>some text <i>in italic</i></p><code>keep\n    indented</code></div>'
+        self.assertEqual(node.to_html(minify=True), html)
     def test_to_html1(self):
         node = ParentNode(
             "p",
@@ -199,7 +222,7 @@ hey
 
 """       
         expected_html = ParentNode("div", [
-            LeafNode("h1", "Hi I'm the title #1"),
+            LeafNode("h1", "Hi I'm the title #1", {"id": "hi-im-the-title-1"}),
             LeafNode("p", "hey")
         ])
         html = markdown_to_html_node(md)
@@ -213,7 +236,7 @@ hey this is **bold** and this *italic*
 
 """       
         expected_html = ParentNode("div", [
-            LeafNode("h1", "Hi I'm the title #1"),
+            LeafNode("h1", "Hi I'm the title #1", {"id": "hi-im-the-title-1"}),
             ParentNode("p", [
                 LeafNode(None, "hey this is "),
                 LeafNode("b", "bold"),
@@ -232,7 +255,7 @@ hey this is an ![image](https://i.imgur.com/zjjcJKZ.png) and this a [link](https
 
 """       
         expected_html = ParentNode("div", [
-            LeafNode("h1", "Hi I'm the title #1"),
+            LeafNode("h1", "Hi I'm the title #1", {"id": "hi-im-the-title-1"}),
             ParentNode("p", [
                 LeafNode(None, "hey this is an "),
                 LeafNode("img", "", props={"src":"https://i.imgur.com/zjjcJKZ.png", "alt":"image"}),
@@ -254,7 +277,7 @@ hey
 * and
 *   i'm a list"""       
         expected_html = ParentNode("div", [
-            LeafNode("h1", "Hi I'm the title #1"),
+            LeafNode("h1", "Hi I'm the title #1", {"id": "hi-im-the-title-1"}),
             LeafNode("p", "hey"),
             ParentNode("ul", [
                 LeafNode("li", "hi"),
@@ -275,7 +298,7 @@ hey
 2. there is a **bold word** here
 """       
         expected_html = ParentNode("div", [
-            LeafNode("h1", "Hi I'm the title #1"),
+            LeafNode("h1", "Hi I'm the title #1", {"id": "hi-im-the-title-1"}),
             LeafNode("p", "hey"),
             ParentNode("ol", [
                 LeafNode("li", "look below"),
@@ -302,7 +325,7 @@ func(*args)
 ```
 """       
         expected_html = ParentNode("div", [
-            LeafNode("h1", "Hi I'm the title #1"),
+            LeafNode("h1", "Hi I'm the title #1", {"id": "hi-im-the-title-1"}),
             LeafNode("p", "hey"),
             LeafNode("code", """# this is real code
 s, *ss = my_list
@@ -320,7 +343,7 @@ func(*args)"""),
 > quoting `code`.
 """       
         expected_html = ParentNode("div", [
-            LeafNode("h1", "Hi I'm the title #1"),
+            LeafNode("h1", "Hi I'm the title #1", {"id": "hi-im-the-title-1"}),
             ParentNode("blockquote", [
                 LeafNode(None, "quoting "),
                 LeafNode("i", "me"),
@@ -344,12 +367,98 @@ hey
             ParentNode("h2",[
                 LeafNode(None, "Hi I'm the title "),
                 LeafNode("b", "#1")
-            ] ),
+            ], {"id": "hi-im-the-title-1"}),
             LeafNode("p", "hey"),
         ])
         html = markdown_to_html_node(md)
         self.assertEqual(html, expected_html)
 
+    def test_markdown_to_html_node_toc(self):
+        md = """
+# Title
+
+## Install
+
+### From **source**
+
+## Install
+"""
+        toc = TableOfContents()
+        html = markdown_to_html_node(md, toc).to_html()
+        expected_html = ('<div><h1 id="title">Title</h1><h2 id="install">Install</h2>'
+                         '<h3 id="from-source">From <b>source</b></h3><h2 id="install-1">Install</h2></div>')
+        self.assertEqual(html, expected_html)
+        expected_entries = [(1, "title", "Title"), (2, "install", "Install"),
+                            (3, "from-source", "From source"), (2, "install-1", "Install")]
+        self.assertListEqual(toc.entries, expected_entries)
+        expected_toc = ('<nav class="toc"><ul><li><a href="#title">Title</a><ul>'
+                        '<li><a href="#install">Install</a><ul><li><a href="#from-source">From source</a></li></ul></li>'
+                        '<li><a href="#install-1">Install</a></li></ul></li></ul></nav>')
+        self.assertEqual(toc.to_html(), expected_toc)
+
+
+class TestIncludes(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        os.mkdir(os.path.join(self.dir, "_partials"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_include(self):
+        self.write("_partials/warn.md", "## Warning\n\nBe *careful*.\n\n{{< include note.md >}}")
+        self.write("_partials/note.md", "A note.")
+        page = self.write("page.md", "# Page\n\n{{< include _partials/warn.md >}}\n\ntext")
+        cache = {}
+        includes = Includes(page, cache)
+        toc = TableOfContents()
+        html = markdown_to_html_node("# Page\n\n{{< include _partials/warn.md >}}\n\ntext", toc, includes).to_html()
+        expected_html = ('<div><h1 id="page">Page</h1><h2 id="warning">Warning</h2>'
+                         '<p>Be <i>careful</i>.</p><p>A note.</p><p>text</p></div>')
+        self.assertEqual(html, expected_html)
+        self.assertListEqual(toc.entries, [(1, "page", "Page"), (2, "warning", "Warning")])
+        expected_deps = {os.path.join(self.dir, "_partials", "warn.md"), os.path.join(self.dir, "_partials", "note.md")}
+        self.assertSetEqual(includes.deps, expected_deps)
+        self.assertEqual(len(cache), 2)
+
+    def test_include_cached(self):
+        warn = self.write("_partials/warn.md", "Careful.\n\n{{< include note.md >}}")
+        self.write("_partials/note.md", "A note.")
+        cache = {}
+        Includes(os.path.join(self.dir, "a.md"), cache).include("_partials/warn.md")
+        includes = Includes(os.path.join(self.dir, "b.md"), cache)
+        os.remove(warn)
+        fragment = includes.include("_partials/warn.md")
+        self.assertEqual(fragment.to_html(), "<p>Careful.</p><p>A note.</p>")
+        self.assertEqual(len(includes.deps), 2)
+
+    def test_include_heading_ids(self):
+        self.write("_partials/warn.md", "## Warning\n\nOne.\n\n## Warning\n\nTwo.")
+        cache = {}
+        page = "## Warning\n\n{{< include _partials/warn.md >}}"
+        toc = TableOfContents()
+        html = markdown_to_html_node(page, toc, Includes(os.path.join(self.dir, "page.md"), cache)).to_html()
+        expected_html = ('<div><h2 id="warning">Warning</h2><h2 id="warning-1">Warning</h2><p>One.</p>'
+                         '<h2 id="warning-1-1">Warning</h2><p>Two.</p></div>')
+        self.assertEqual(html, expected_html)
+        self.assertListEqual([slug for _, slug, _ in toc.entries], ["warning", "warning-1", "warning-1-1"])
+        other_page = markdown_to_html_node("{{< include _partials/warn.md >}}", TableOfContents(),
+                                           Includes(os.path.join(self.dir, "other.md"), cache)).to_html()
+        self.assertEqual(other_page, '<div><h2 id="warning">Warning</h2><p>One.</p><h2 id="warning-1">Warning</h2><p>Two.</p></div>')
+
+    def test_include_cycle(self):
+        self.write("_partials/a.md", "{{< include b.md >}}")
+        self.write("_partials/b.md", "{{< include a.md >}}")
+        with self.assertRaises(Exception):
+            Includes(os.path.join(self.dir, "page.md"), {}).include("_partials/a.md")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,107 @@
+import os
+import signal
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from htmlnode import LeafNode, ParentNode
+from limits import PageLimits, PageLimitExceeded, count_nodes
+from deps import DependencyManifest
+from main import generate_pages_recursive
+from writer import OutputWriter, prune_directory
+
+
+class TestPageLimits(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_count_nodes(self):
+        node = ParentNode("div", [LeafNode("b", "x"), ParentNode("p", [LeafNode(None, "y"), LeafNode("i", "z")])])
+        self.assertEqual(count_nodes(node), 5)
+        self.assertEqual(count_nodes(node, limit=2), 3)
+
+    def test_check_size(self):
+        path = self.write("page.md", "# Title\n\n" + "x" * 100)
+        PageLimits(max_bytes=1000).check_size(path)
+        with self.assertRaises(PageLimitExceeded):
+            PageLimits(max_bytes=10).check_size(path)
+
+    def test_check_nodes(self):
+        node = ParentNode("div", [LeafNode("b", "x")] * 10)
+        PageLimits(max_nodes=11).check_nodes(node)
+        with self.assertRaises(PageLimitExceeded):
+            PageLimits(max_nodes=10).check_nodes(node)
+
+    @unittest.skipUnless(hasattr(signal, "setitimer"), "needs signal.setitimer")
+    def test_time_limit(self):
+        with self.assertRaises(PageLimitExceeded):
+            with PageLimits(max_seconds=0.05).time_limit():
+                while True:
+                    pass
+        with PageLimits(max_seconds=1).time_limit():
+            pass
+
+    @unittest.skipUnless(hasattr(signal, "setitimer"), "needs signal.setitimer")
+    def test_time_limit_during_flush(self):
+        writer = OutputWriter(durable=True, batch_size=2)
+        replace = os.replace
+        def slow_replace(src, dst):
+            replace(src, dst)
+            time.sleep(0.1)
+        with mock.patch("os.replace", side_effect=slow_replace):
+            with self.assertRaises(PageLimitExceeded):
+                with PageLimits(max_seconds=0.05).time_limit():
+                    writer.write(os.path.join(self.dir, "a.html"), "a")
+                    writer.write(os.path.join(self.dir, "b.html"), "b")
+        writer.close()
+        self.assertListEqual(sorted(os.listdir(self.dir)), ["a.html", "b.html"])
+
+    def test_collect_failures(self):
+        template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/good.md", "# Good\n\nfine")
+        self.write("content/bad.md", "# Bad\n\nunclosed **bold")
+        self.write("content/big.md", "# Big\n\n" + "x" * 1000)
+        dest = os.path.join(self.dir, "public")
+        os.makedirs(dest)
+        failures = []
+        pages = generate_pages_recursive(os.path.join(self.dir, "content"), template, dest,
+                                         limits=PageLimits(max_bytes=500), failures=failures)
+        self.assertListEqual([page.title for page in pages], ["Good"])
+        self.assertListEqual(sorted(os.path.basename(path) for path, _ in failures), ["bad.md", "big.md"])
+        self.assertListEqual(os.listdir(dest), ["good.html"])
+        with self.assertRaises(Exception):
+            generate_pages_recursive(os.path.join(self.dir, "content"), template, dest)
+
+    def test_failed_page_keeps_previous_output(self):
+        template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        content = os.path.join(self.dir, "content")
+        dest = os.path.join(self.dir, "public")
+        for deps in (None, DependencyManifest(os.path.join(self.dir, "deps.json"), {})):
+            self.write("content/good.md", "# Good\n\nfine")
+            self.write("content/page.md", "# Page\n\nfine")
+            generate_pages_recursive(content, template, dest, deps=deps, failures=[])
+            self.write("content/page.md", "# Page\n\nunclosed **bold")
+            os.utime(os.path.join(content, "page.md"), ns=(1, 1))
+            writer = OutputWriter(digests={})
+            failures = []
+            pages = generate_pages_recursive(content, template, dest, writer, deps=deps, failures=failures)
+            self.assertListEqual(sorted(page.title for page in pages), ["Good", "Page"])
+            self.assertEqual(len(failures), 1)
+            self.assertListEqual(prune_directory(dest, writer.outputs), [])
+            with open(os.path.join(dest, "page.html")) as f:
+                self.assertEqual(f.read(), "<title>Page</title><div><h1 id=\"page\">Page</h1><p>fine</p></div>")
+
+if __name__ == "__main__":
+    unittest.main()
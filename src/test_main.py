@@ -1,5 +1,7 @@
+import os
+import tempfile
 import unittest
-from main import extract_title
+from main import extract_title, generate_page
 
 class TestGenPage(unittest.TestCase):
 	def test_extract_title(self):
@@ -25,6 +27,41 @@ class TestGenPage(unittest.TestCase):
 		expected_title = "title"
 		title = extract_title(md)
 		self.assertEqual(title, expected_title)
+
+	def test_extract_title_front_matter(self):
+		md = """---
+title: Front title
+---
+# title
+"""
+		expected_title = "Front title"
+		title = extract_title(md)
+		self.assertEqual(title, expected_title)
+
+	def test_generate_page_body_starting_with_fence(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			from_path = os.path.join(tmp, "page.md")
+			with open(from_path, "w") as f:
+				f.write("---\ndate: 2024-01-01\n---\n---\nnot front matter\n\n# Body title\n")
+			template_path = os.path.join(tmp, "template.html")
+			with open(template_path, "w") as f:
+				f.write("<title>{{ Title }}</title>{{ Content }}")
+			pages = generate_page(from_path, template_path, os.path.join(tmp, "page.html"))
+			self.assertEqual(pages[0].title, "Body title")
+
+	def test_generate_page_escapes_title(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			from_path = os.path.join(tmp, "page.md")
+			with open(from_path, "w") as f:
+				f.write("---\ntitle: Q&A <draft>\n---\n# Body title\n")
+			template_path = os.path.join(tmp, "template.html")
+			with open(template_path, "w") as f:
+				f.write("<title>{{ Title }}</title>")
+			dest_path = os.path.join(tmp, "page.html")
+			pages = generate_page(from_path, template_path, dest_path)
+			self.assertEqual(pages[0].title, "Q&A <draft>")
+			with open(dest_path) as f:
+				self.assertEqual(f.read(), "<title>Q&amp;A &lt;draft&gt;</title>")
 	
 if __name__ == "__main__":
 	unittest.main()
\ No newline at end of file
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+from htmlnode import iter_markdown_blocks, markdown_to_blocks
+from limits import PageLimits, PageLimitExceeded
+from pagination import iter_sections, page_paths, paginate_markdown
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_same_as_markdown_to_blocks(self):
+        md = """# Title
+
+
+paragraph
+still paragraph
+
+* item 1
+* item 2
+"""
+        blocks = list(iter_markdown_blocks(md.splitlines(keepends=True)))
+        self.assertListEqual(blocks, markdown_to_blocks(md))
+
+
+class TestPagination(unittest.TestCase):
+    def test_iter_sections(self):
+        blocks = ["intro", "# Title", "text", "### Sub", "more", "## Part", "end"]
+        sections = list(iter_sections(iter(blocks)))
+        expected_sections = [["intro", "# Title", "text", "### Sub", "more"], ["## Part", "end"]]
+        self.assertListEqual(sections, expected_sections)
+
+    def test_page_paths(self):
+        paths = page_paths("public/api/index.html", 3)
+        expected_paths = ["public/api/index.html", "public/api/index-2.html", "public/api/index-3.html"]
+        self.assertListEqual(paths, expected_paths)
+
+    def test_paginate_markdown(self):
+        md = "# API\n\nintro\n\n## First\n\none\n\n## Second\n\ntwo\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            from_path = os.path.join(tmp, "api.md")
+            with open(from_path, 'w') as f:
+                f.write(md)
+            pages = list(paginate_markdown(from_path, "public/api.html"))
+        self.assertListEqual([p for p, _, _, _ in pages], ["public/api.html", "public/api-2.html", "public/api-3.html"])
+        self.assertListEqual([t for _, t, _, _ in pages], ["API", "API - First", "API - Second"])
+        _, _, html, toc = pages[1]
+        self.assertIn('<a href="api.html" rel="prev">Previous</a>', html)
+        self.assertIn('<a href="api-3.html" rel="next">Next</a>', html)
+        self.assertIn('<a href="api-2.html" aria-current="page">First</a>', html)
+        self.assertIn('<div><h2 id="first">First</h2><p>one</p></div>', html)
+        self.assertEqual(toc, '<nav class="toc"><ul><li><a href="#first">First</a></li></ul></nav>')
+        self.assertNotIn('two', html)
+
+    def test_paginate_markdown_node_limit(self):
+        md = "# API\n\nintro\n\n## First\n\none\n\n## Second\n\n" + "\n".join(f"- item {i}" for i in range(20)) + "\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            from_path = os.path.join(tmp, "api.md")
+            with open(from_path, 'w') as f:
+                f.write(md)
+            pages = paginate_markdown(from_path, "public/api.html", limits=PageLimits(max_nodes=10))
+            self.assertEqual(len([next(pages), next(pages)]), 2)
+            with self.assertRaises(PageLimitExceeded):
+                next(pages)
+
+if __name__ == "__main__":
+    unittest.main()
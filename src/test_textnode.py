@@ -156,6 +156,21 @@ class TestExtractMD(unittest.TestCase):
         for lnk, elnk in zip(links, expected_links):
             self.assertEqual(lnk, elnk)
 
+    def test_extract_links_identifier_brackets(self):
+        text = "Read settings[key_name] with [os.environ](https://docs.python.org/3/library/os.html#os.environ)"
+        links = extract_markdown_links(text)
+        self.assertListEqual(links, [("os.environ", "https://docs.python.org/3/library/os.html#os.environ")])
+
+    def test_extract_links_unbalanced_brackets(self):
+        text = "[" * 20000 + "](" * 20000
+        self.assertListEqual(extract_markdown_links(text), [])
+        self.assertListEqual(extract_markdown_links("[[a](b)"), [("a", "b")])
+
+    def test_extract_images_unbalanced_brackets(self):
+        text = "![" * 20000 + "](" * 20000
+        self.assertListEqual(extract_markdown_images(text), [])
+        self.assertListEqual(extract_markdown_images("![[![alt](img.png)"), [("alt", "img.png")])
+
 if __name__ == "__main__":
     unittest.main()
 
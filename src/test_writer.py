@@ -0,0 +1,149 @@
+import os
+import tempfile
+import unittest
+
+from writer import OutputWriter, prune_directory, swap_directory
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_write_chunks(self):
+        dest = os.path.join(self.dir, "page.html")
+        content = "<p>" + "x" * 1000 + "</p>"
+        OutputWriter(chunk_size=64).write(dest, content)
+        with open(dest) as f:
+            self.assertEqual(f.read(), content)
+        self.assertEqual(os.listdir(self.dir), ["page.html"])
+
+    def test_write_replaces(self):
+        dest = os.path.join(self.dir, "page.html")
+        writer = OutputWriter()
+        writer.write(dest, "old")
+        writer.write(dest, "new")
+        with open(dest) as f:
+            self.assertEqual(f.read(), "new")
+
+    def test_durable_publishes_on_close(self):
+        dest = os.path.join(self.dir, "page.html")
+        with OutputWriter(durable=True) as writer:
+            writer.write(dest, "content")
+            self.assertFalse(os.path.exists(dest))
+        with open(dest) as f:
+            self.assertEqual(f.read(), "content")
+        self.assertEqual(os.listdir(self.dir), ["page.html"])
+
+    def test_durable_batch(self):
+        with OutputWriter(durable=True, batch_size=2) as writer:
+            writer.write(os.path.join(self.dir, "a.html"), "a")
+            writer.write(os.path.join(self.dir, "b.html"), "b")
+            self.assertEqual(sorted(os.listdir(self.dir)), ["a.html", "b.html"])
+
+    def test_durable_discard_on_error(self):
+        dest = os.path.join(self.dir, "page.html")
+        with self.assertRaises(ValueError):
+            with OutputWriter(durable=True) as writer:
+                writer.write(dest, "content")
+                raise ValueError("build failed")
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_copy(self):
+        src = os.path.join(self.dir, "src.bin")
+        with open(src, 'wb') as f:
+            f.write(b"\x00\x01" * 100)
+        dest = os.path.join(self.dir, "dest.bin")
+        OutputWriter(chunk_size=16).copy(src, dest)
+        with open(dest, 'rb') as f:
+            self.assertEqual(f.read(), b"\x00\x01" * 100)
+
+    def test_differential_write(self):
+        dest = os.path.join(self.dir, "page.html")
+        digests = {}
+        writer = OutputWriter(digests=digests)
+        self.assertTrue(writer.write(dest, "content"))
+        os.utime(dest, ns=(1, 1))
+        self.assertFalse(writer.write(dest, "content"))
+        self.assertEqual(os.stat(dest).st_mtime_ns, 1)
+        self.assertTrue(writer.write(dest, "changed"))
+        self.assertEqual((writer.written, writer.unchanged), (2, 1))
+
+    def test_differential_existing_file(self):
+        dest = os.path.join(self.dir, "page.html")
+        with open(dest, "w") as f:
+            f.write("content")
+        writer = OutputWriter(digests={})
+        self.assertFalse(writer.write(dest, "content"))
+        self.assertEqual((writer.written, writer.unchanged), (0, 1))
+
+    def test_differential_copy(self):
+        src = os.path.join(self.dir, "src.bin")
+        with open(src, 'wb') as f:
+            f.write(b"data")
+        dest = os.path.join(self.dir, "dest.bin")
+        writer = OutputWriter(digests={})
+        writer.copy(src, dest)
+        writer.copy(src, dest)
+        self.assertEqual((writer.written, writer.unchanged), (1, 1))
+
+    def test_outputs(self):
+        writer = OutputWriter(digests={})
+        writer.write(os.path.join(self.dir, "a.html"), "a")
+        writer.write(os.path.join(self.dir, "a.html"), "a")
+        writer.keep(os.path.join(self.dir, "b.html"))
+        self.assertSetEqual(writer.outputs, {os.path.join(self.dir, "a.html"), os.path.join(self.dir, "b.html")})
+
+
+class TestPruneDirectory(unittest.TestCase):
+    def test_prune(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "old"))
+            os.makedirs(os.path.join(root, "kept"))
+            for name in ("index.html", os.path.join("old", "index.html"), os.path.join("kept", "index.html")):
+                open(os.path.join(root, name), 'w').close()
+            keep = {os.path.join(root, "index.html"), os.path.join(root, "kept", "index.html")}
+            removed = prune_directory(root, keep)
+            self.assertListEqual(removed, [os.path.join(root, "old", "index.html")])
+            self.assertListEqual(sorted(os.listdir(root)), ["index.html", "kept"])
+
+
+class TestSwapDirectory(unittest.TestCase):
+    def test_swap(self):
+        with tempfile.TemporaryDirectory() as root:
+            target = os.path.join(root, "public")
+            staging = os.path.join(root, "public.staging")
+            os.mkdir(target)
+            open(os.path.join(target, "old.html"), 'w').close()
+            os.mkdir(staging)
+            open(os.path.join(staging, "new.html"), 'w').close()
+            swap_directory(staging, target)
+            self.assertEqual(os.listdir(target), ["new.html"])
+            self.assertTrue(os.path.islink(target))
+            release = os.readlink(target)
+            self.assertEqual(sorted(os.listdir(root)), sorted(["public", release]))
+
+            os.mkdir(staging)
+            open(os.path.join(staging, "newer.html"), 'w').close()
+            swap_directory(staging, target)
+            self.assertEqual(os.listdir(target), ["newer.html"])
+            self.assertNotEqual(os.readlink(target), release)
+            self.assertEqual(sorted(os.listdir(root)), sorted(["public", os.readlink(target)]))
+
+    def test_swap_keeps_cwd_readers(self):
+        with tempfile.TemporaryDirectory() as root:
+            target = os.path.join(root, "public")
+            for content in ("old", "new"):
+                staging = os.path.join(root, "public.staging")
+                os.mkdir(staging)
+                with open(os.path.join(staging, "index.html"), 'w') as f:
+                    f.write(content)
+                swap_directory(staging, target)
+                with open(os.path.join(target, "index.html")) as f:
+                    self.assertEqual(f.read(), content)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -43,12 +43,12 @@ def split_nodes_delimiter(old_nodes:list[TextNode], delimiter:str, text_type:Tex
     return new_nodes
 
 def extract_markdown_images(text:str) -> list[tuple[str, str]]:
-    img_pattern = r"!\[(.*?)\]\((.*?)\)"
+    img_pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
     matches = re.findall(img_pattern, text)
     return matches
 
 def extract_markdown_links(text:str) -> list[tuple[str,str]]:
-    link_pattern = r"\[(.*?)\]\((.*?)\)"
+    link_pattern = r"\[([^\[\]]*)\]\(([^\(\)]*)\)"
     matches = re.findall(link_pattern, text)
     return matches
 
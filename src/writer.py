@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import shutil
+import signal
+import tempfile
+from contextlib import contextmanager
+
+CHUNK_SIZE = 1 << 20
+BATCH_SIZE = 256
+
+# mkstemp creates files as 0600, published files get the usual umask permissions instead
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def file_digest(path:str, chunk_size:int=CHUNK_SIZE) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_digests(digests_path:str) -> dict:
+    if not os.path.exists(digests_path):
+        return {}
+    with open(digests_path) as digests_file:
+        return json.load(digests_file)
+
+def save_digests(digests_path:str, digests:dict) -> None:
+    '''It saves the digests of the files that still exist.'''
+    os.makedirs(os.path.dirname(digests_path) or ".", exist_ok=True)
+    digests = {path: digest for path, digest in digests.items() if os.path.exists(path)}
+    OutputWriter().write(digests_path, json.dumps(digests, sort_keys=True))
+
+def fsync_directory(directory:str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+@contextmanager
+def _alarm_blocked():
+    if not hasattr(signal, "pthread_sigmask"):
+        yield
+        return
+    previous = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+    try:
+        yield
+    finally:
+        signal.pthread_sigmask(signal.SIG_SETMASK, previous)
+
+
+
+class OutputWriter:
+    """
+    Writes build outputs so that readers never see a half-written file.
+    - Every output is written to a temporary file next to its destination, in chunks of `chunk_size` bytes,
+      and published with an atomic rename.
+    - With `durable`, renames are deferred and batched: pending files are fsynced, renamed,
+      and each touched directory is fsynced once per batch instead of once per file.
+    - `close()` must be called to publish the last batch.
+    - With `digests` (path -> [size, mtime_ns, sha256] of the files written by previous builds), an output
+      whose bytes are identical to the existing file is not rewritten, keeping its mtime.
+      The existing file is only read when its size or mtime differ from the stored digest.
+    `written` and `unchanged` count the outputs of each kind. `outputs` holds the paths of every output of the build:
+    written, unchanged, or left in place on purpose and declared with `keep()`.
+    """
+    def __init__(self, durable:bool=False, chunk_size:int=CHUNK_SIZE, batch_size:int=BATCH_SIZE,
+                 digests:dict|None=None) -> None:
+        self.durable = durable
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.digests = digests
+        self.written = 0
+        self.unchanged = 0
+        self.outputs: set[str] = set()
+        self._pending: list[tuple[str, str, str|None]] = []
+
+    def write(self, dest_path:str, content:str|bytes) -> bool:
+        '''It returns False if the file already had this content and was left untouched.'''
+        data = content.encode() if isinstance(content, str) else content
+        self.keep(dest_path)
+        digest = None
+        if self.digests is not None:
+            digest = hashlib.sha256(data).hexdigest()
+            if self._is_unchanged(dest_path, digest):
+                return False
+        tmp_path = self._open_temp(dest_path, lambda f: self._write_chunks(f, data))
+        self._publish(tmp_path, dest_path, digest)
+        return True
+
+    def copy(self, src_path:str, dest_path:str) -> str:
+        self.keep(dest_path)
+        digest = None
+        if self.digests is not None:
+            digest = file_digest(src_path, self.chunk_size)
+            if self._is_unchanged(dest_path, digest):
+                return dest_path
+        with open(src_path, 'rb') as src_file:
+            tmp_path = self._open_temp(dest_path, lambda f: shutil.copyfileobj(src_file, f, self.chunk_size))
+        shutil.copymode(src_path, tmp_path)
+        self._publish(tmp_path, dest_path, digest)
+        return dest_path
+
+    def keep(self, dest_path:str) -> None:
+        '''It records an existing output that this build deliberately did not write (e.g. an up-to-date page).'''
+        self.outputs.add(os.path.normpath(dest_path))
+
+    def flush(self) -> None:
+        '''
+        It publishes the pending batch, with timer signals (see `limits.PageLimits.time_limit`) held back
+        until it is done. Entries leave the batch as they are renamed, so a failed flush can be resumed.
+        '''
+        if not self._pending:
+            return
+        with _alarm_blocked():
+            for tmp_path, _, _ in self._pending:
+                fd = os.open(tmp_path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            directories = set()
+            while self._pending:
+                tmp_path, dest_path, digest = self._pending[0]
+                self._replace(tmp_path, dest_path, digest)
+                self._pending.pop(0)
+                directories.add(os.path.dirname(os.path.abspath(dest_path)))
+            for directory in directories:
+                fsync_directory(directory)
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            for tmp_path, _, _ in self._pending:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self._pending = []
+
+    def _write_chunks(self, f, data:bytes) -> None:
+        view = memoryview(data)
+        for start in range(0, len(view), self.chunk_size):
+            f.write(view[start:start + self.chunk_size])
+
+    def _open_temp(self, dest_path:str, fill) -> str:
+        parent, name = os.path.split(os.path.abspath(dest_path))
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=parent)
+        try:
+            os.fchmod(fd, 0o666 & ~_UMASK)
+            with os.fdopen(fd, 'wb', buffering=self.chunk_size) as tmp_file:
+                fill(tmp_file)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tmp_path
+
+    def _is_unchanged(self, dest_path:str, digest:str) -> bool:
+        assert self.digests is not None
+        try:
+            st = os.stat(dest_path)
+        except FileNotFoundError:
+            return False
+        key = os.path.normpath(dest_path)
+        stored = self.digests.get(key)
+        if not stored or stored[0] != st.st_size or stored[1] != st.st_mtime_ns:
+            stored = self.digests[key] = [st.st_size, st.st_mtime_ns, file_digest(dest_path, self.chunk_size)]
+        if stored[2] != digest:
+            return False
+        self.unchanged += 1
+        return True
+
+    def _publish(self, tmp_path:str, dest_path:str, digest:str|None) -> None:
+        self.written += 1
+        if not self.durable:
+            self._replace(tmp_path, dest_path, digest)
+            return
+        self._pending.append((tmp_path, dest_path, digest))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def _replace(self, tmp_path:str, dest_path:str, digest:str|None) -> None:
+        os.replace(tmp_path, dest_path)
+        if self.digests is not None and digest is not None:
+            st = os.stat(dest_path)
+            self.digests[os.path.normpath(dest_path)] = [st.st_size, st.st_mtime_ns, digest]
+
+
+def prune_directory(directory:str, keep:set[str]) -> list[str]:
+    '''It removes the files under `directory` whose normalized path is not in `keep`, then the emptied directories.'''
+    removed = []
+    for root, dirs, names in os.walk(directory, topdown=False):
+        for name in names:
+            path = os.path.normpath(os.path.join(root, name))
+            if path not in keep:
+                os.remove(path)
+                removed.append(path)
+        if os.path.normpath(root) != os.path.normpath(directory) and not os.listdir(root):
+            os.rmdir(root)
+    return removed
+
+
+def swap_directory(staging_dir:str, target_dir:str) -> None:
+    '''
+    Publishes a fully built `staging_dir` as `target_dir`.
+    `target_dir` is a symlink to the current release directory (`.<name>.<random>` next to it):
+    the staging tree becomes a new release and the link is flipped with an atomic rename, so readers
+    resolving `target_dir` see either the complete old site or the complete new one.
+    The previous release is removed afterwards. The first swap over a real directory moves it aside
+    before creating the link, so only that one is not atomic.
+    '''
+    if not os.path.isdir(staging_dir):
+        raise Exception(f'staging directory not found {staging_dir}')
+    parent, name = os.path.split(os.path.abspath(target_dir))
+    release_dir = tempfile.mkdtemp(prefix=f".{name}.", dir=parent)
+    os.rename(staging_dir, release_dir)
+    old_dir = None
+    if os.path.islink(target_dir):
+        old_dir = os.path.join(parent, os.readlink(target_dir))
+    elif os.path.exists(target_dir):
+        old_dir = tempfile.mkdtemp(prefix=f".{name}.old.", dir=parent)
+        os.rename(target_dir, os.path.join(old_dir, "tree"))
+    tmp_link = os.path.join(parent, f".{name}.link.{os.getpid()}")
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(os.path.basename(release_dir), tmp_link)
+    os.replace(tmp_link, target_dir)
+    fsync_directory(parent)
+    if old_dir and os.path.isdir(old_dir):
+        shutil.rmtree(old_dir)